@@ -0,0 +1,25 @@
+"""add index for exact biomarker name lookups
+
+Revision ID: 2026012000001
+Revises: 2026011800001
+Create Date: 2026-01-20 00:00:01.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "2026012000001"
+down_revision = "2026011800001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_biomarker_name", "biomarker", ["name"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_biomarker_name", table_name="biomarker")
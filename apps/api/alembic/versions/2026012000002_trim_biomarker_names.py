@@ -0,0 +1,30 @@
+"""trim biomarker names and enforce it with a check constraint
+
+Revision ID: 2026012000002
+Revises: 2026012000001
+Create Date: 2026-01-20 00:00:02.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "2026012000002"
+down_revision = "2026012000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE biomarker SET name = trim(name) WHERE name <> trim(name)")
+    op.create_check_constraint(
+        "biomarker_name_trimmed_check",
+        "biomarker",
+        "name = trim(name)",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("biomarker_name_trimmed_check", "biomarker", type_="check")
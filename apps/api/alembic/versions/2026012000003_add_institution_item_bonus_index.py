@@ -0,0 +1,39 @@
+"""add covering index for priced institution offers by item
+
+Revision ID: 2026012000003
+Revises: 2026012000002
+Create Date: 2026-01-20 00:00:03.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2026012000003"
+down_revision = "2026012000002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_institution_item_bonus",
+            "institution_item",
+            ["institution_id", "item_id"],
+            postgresql_include=["price_now_grosz"],
+            postgresql_where=sa.text("is_available = true AND price_now_grosz > 0"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_institution_item_bonus",
+            table_name="institution_item",
+            postgresql_concurrently=True,
+        )
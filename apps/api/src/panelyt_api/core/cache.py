@@ -3,6 +3,9 @@
 This module provides TTL-based caches for:
 - Catalog metadata (changes only after ingestion)
 - Optimization results (deterministic for same inputs)
+- Optimization candidates (shared by solve and addon computation)
+- Bonus biomarker prices (single-test prices for extra biomarkers)
+- Item biomarkers (tokens and labels attached to each item)
 - Freshness check results (avoid repeated DB queries)
 - User activity recording (debounce writes)
 """
@@ -11,21 +14,38 @@ from __future__ import annotations
 
 import hashlib
 import logging
-from collections.abc import Sequence
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import replace
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 from cachetools import TTLCache
 
+from panelyt_api.utils.normalization import normalize_tokens_iter
+
 if TYPE_CHECKING:
     from panelyt_api.ingest.repository import CatalogRepository
-    from panelyt_api.optimization.context import OptimizationContext
+    from panelyt_api.optimization.context import CandidateItem, OptimizationContext
     from panelyt_api.schemas.common import BiomarkerOut, CatalogMeta
     from panelyt_api.schemas.optimize import OptimizeResponse
 
 logger = logging.getLogger(__name__)
 
 
+def _canonical_biomarker_key(biomarkers: Sequence[str]) -> tuple[str, ...]:
+    """Normalize, deduplicate and sort biomarkers so equivalent requests match."""
+    return tuple(sorted(set(normalize_tokens_iter(biomarkers))))
+
+
+def _biomarker_key_digest(biomarkers: Sequence[str], institution_id: int) -> str:
+    key_string = f"{institution_id}:" + ",".join(_canonical_biomarker_key(biomarkers))
+    return hashlib.sha256(key_string.encode()).hexdigest()[:32]
+
+
+def _copy_candidates(items: Iterable[CandidateItem]) -> Iterable[CandidateItem]:
+    return (replace(item, coverage=set(item.coverage)) for item in items)
+
+
 class CatalogMetaCache:
     """Cache for catalog metadata (item count, biomarker count, etc.).
 
@@ -101,9 +121,7 @@ class OptimizationCache:
 
     def make_key(self, biomarkers: Sequence[str], institution_id: int) -> str:
         """Create a cache key from optimization parameters."""
-        sorted_biomarkers = sorted(b.lower().strip() for b in biomarkers)
-        key_string = f"{institution_id}:" + ",".join(sorted_biomarkers)
-        return hashlib.sha256(key_string.encode()).hexdigest()[:32]
+        return _biomarker_key_digest(biomarkers, institution_id)
 
     def clear(self) -> None:
         self._cache.clear()
@@ -159,9 +177,111 @@ class OptimizationContextCache:
 
         Uses biomarkers and institution since offers vary per institution.
         """
-        sorted_biomarkers = sorted(b.lower().strip() for b in biomarkers)
-        key_string = f"{institution_id}:" + ",".join(sorted_biomarkers)
-        return hashlib.sha256(key_string.encode()).hexdigest()[:32]
+        return _biomarker_key_digest(biomarkers, institution_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._cache)}
+
+
+class CandidateCache:
+    """Cache for candidate items collected for a biomarker set.
+
+    Lets compute_addons() skip the candidate query after the context cache
+    has been evicted. Candidates are copied on the way in and out, so a
+    caller mutating one (its coverage set included) cannot affect later
+    hits. Uses a short TTL since it only bridges requests made shortly
+    after one another.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: int = 60) -> None:
+        self._cache: TTLCache[tuple[int, frozenset[int]], tuple[CandidateItem, ...]] = (
+            TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        )
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: tuple[int, frozenset[int]]) -> list[CandidateItem] | None:
+        result = self._cache.get(key)
+        if result is not None:
+            self._hits += 1
+            logger.debug(
+                "candidate cache hit (hits=%d, misses=%d, size=%d)",
+                self._hits,
+                self._misses,
+                len(self._cache),
+            )
+            return list(_copy_candidates(result))
+        self._misses += 1
+        logger.debug(
+            "candidate cache miss (hits=%d, misses=%d, size=%d)",
+            self._hits,
+            self._misses,
+            len(self._cache),
+        )
+        return None
+
+    def set(self, key: tuple[int, frozenset[int]], value: Iterable[CandidateItem]) -> None:
+        self._cache[key] = tuple(_copy_candidates(value))
+
+    def make_key(
+        self, biomarker_ids: Sequence[int], institution_id: int
+    ) -> tuple[int, frozenset[int]]:
+        return institution_id, frozenset(biomarker_ids)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._cache)}
+
+
+class BonusPriceCache:
+    """Cache for best single-test prices of bonus biomarkers.
+
+    Keyed by institution and the exact token mapping requested, since the
+    result is keyed by the caller's tokens. Prices only change on ingestion,
+    which clears every cache.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: int = 300) -> None:
+        self._cache: TTLCache[tuple[int, frozenset[tuple[str, str]]], dict[str, int]] = (
+            TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        )
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: tuple[int, frozenset[tuple[str, str]]]) -> dict[str, int] | None:
+        result = self._cache.get(key)
+        if result is not None:
+            self._hits += 1
+            logger.debug(
+                "bonus price cache hit (hits=%d, misses=%d, size=%d)",
+                self._hits,
+                self._misses,
+                len(self._cache),
+            )
+            return dict(result)
+        self._misses += 1
+        logger.debug(
+            "bonus price cache miss (hits=%d, misses=%d, size=%d)",
+            self._hits,
+            self._misses,
+            len(self._cache),
+        )
+        return None
+
+    def set(self, key: tuple[int, frozenset[tuple[str, str]]], value: dict[str, int]) -> None:
+        self._cache[key] = dict(value)
+
+    def make_key(
+        self, tokens: Mapping[str, str], institution_id: int
+    ) -> tuple[int, frozenset[tuple[str, str]]]:
+        return institution_id, frozenset(tokens.items())
 
     def clear(self) -> None:
         self._cache.clear()
@@ -211,9 +331,59 @@ class BiomarkerBatchCache:
         self._cache[key] = value
 
     def make_key(self, biomarkers: Sequence[str], institution_id: int) -> str:
-        sorted_biomarkers = sorted(b.lower().strip() for b in biomarkers)
-        key_string = f"{institution_id}:" + ",".join(sorted_biomarkers)
-        return hashlib.sha256(key_string.encode()).hexdigest()[:32]
+        return _biomarker_key_digest(biomarkers, institution_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._cache)}
+
+
+class ItemBiomarkerCache:
+    """Cache for the biomarker tokens attached to each item.
+
+    Entries are per item, so a lookup for a new set of items only queries the
+    ids not seen yet. Each entry holds (token, display name) pairs. Item
+    biomarkers only change on ingestion, which clears every cache.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: int = 600) -> None:
+        self._cache: TTLCache[int, tuple[tuple[str, str | None], ...]] = TTLCache(
+            maxsize=maxsize, ttl=ttl_seconds
+        )
+        self._hits = 0
+        self._misses = 0
+
+    def get_many(
+        self, item_ids: Iterable[int]
+    ) -> tuple[dict[int, tuple[tuple[str, str | None], ...]], list[int]]:
+        """Return cached entries and the ids that still have to be loaded."""
+        found: dict[int, tuple[tuple[str, str | None], ...]] = {}
+        missing: list[int] = []
+        for item_id in item_ids:
+            entry = self._cache.get(item_id)
+            if entry is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = entry
+        self._hits += len(found)
+        self._misses += len(missing)
+        logger.debug(
+            "item biomarker cache hits=%d misses=%d (total hits=%d, misses=%d, size=%d)",
+            len(found),
+            len(missing),
+            self._hits,
+            self._misses,
+            len(self._cache),
+        )
+        return found, missing
+
+    def set_many(
+        self, entries: Mapping[int, tuple[tuple[str, str | None], ...]]
+    ) -> None:
+        self._cache.update(entries)
 
     def clear(self) -> None:
         self._cache.clear()
@@ -315,8 +485,12 @@ def _get_cache_settings() -> dict[str, int]:
             "catalog_meta_ttl": s.cache_catalog_meta_ttl,
             "optimization_ttl": s.cache_optimization_ttl,
             "optimization_maxsize": s.cache_optimization_maxsize,
+            "candidates_ttl": s.cache_candidates_ttl,
+            "bonus_prices_ttl": s.cache_bonus_prices_ttl,
             "biomarker_batch_ttl": s.cache_biomarker_batch_ttl,
             "biomarker_batch_maxsize": s.cache_biomarker_batch_maxsize,
+            "item_biomarkers_ttl": s.cache_item_biomarkers_ttl,
+            "item_biomarkers_maxsize": s.cache_item_biomarkers_maxsize,
             "freshness_ttl": s.cache_freshness_ttl,
             "user_activity_debounce": s.cache_user_activity_debounce,
         }
@@ -326,8 +500,12 @@ def _get_cache_settings() -> dict[str, int]:
             "catalog_meta_ttl": 300,
             "optimization_ttl": 3600,
             "optimization_maxsize": 1000,
+            "candidates_ttl": 60,
+            "bonus_prices_ttl": 300,
             "biomarker_batch_ttl": 600,
             "biomarker_batch_maxsize": 2000,
+            "item_biomarkers_ttl": 600,
+            "item_biomarkers_maxsize": 10000,
             "freshness_ttl": 300,
             "user_activity_debounce": 60,
         }
@@ -341,22 +519,36 @@ optimization_cache = OptimizationCache(
 optimization_context_cache = OptimizationContextCache(
     maxsize=_cfg["optimization_maxsize"], ttl_seconds=_cfg["optimization_ttl"]
 )
+candidate_cache = CandidateCache(
+    maxsize=_cfg["optimization_maxsize"], ttl_seconds=_cfg["candidates_ttl"]
+)
+bonus_price_cache = BonusPriceCache(
+    maxsize=_cfg["optimization_maxsize"], ttl_seconds=_cfg["bonus_prices_ttl"]
+)
 biomarker_batch_cache = BiomarkerBatchCache(
     maxsize=_cfg["biomarker_batch_maxsize"], ttl_seconds=_cfg["biomarker_batch_ttl"]
 )
+item_biomarker_cache = ItemBiomarkerCache(
+    maxsize=_cfg["item_biomarkers_maxsize"], ttl_seconds=_cfg["item_biomarkers_ttl"]
+)
 freshness_cache = FreshnessCache(ttl_seconds=_cfg["freshness_ttl"])
 user_activity_debouncer = UserActivityDebouncer(
     debounce_seconds=_cfg["user_activity_debounce"]
 )
 logger.debug(
     "Caches initialized: catalog_meta_ttl=%d, optimization_ttl=%d, "
-    "optimization_maxsize=%d, biomarker_batch_ttl=%d, biomarker_batch_maxsize=%d, "
-    "freshness_ttl=%d, user_activity_debounce=%d",
+    "optimization_maxsize=%d, candidates_ttl=%d, bonus_prices_ttl=%d, "
+    "biomarker_batch_ttl=%d, biomarker_batch_maxsize=%d, item_biomarkers_ttl=%d, "
+    "item_biomarkers_maxsize=%d, freshness_ttl=%d, user_activity_debounce=%d",
     _cfg["catalog_meta_ttl"],
     _cfg["optimization_ttl"],
     _cfg["optimization_maxsize"],
+    _cfg["candidates_ttl"],
+    _cfg["bonus_prices_ttl"],
     _cfg["biomarker_batch_ttl"],
     _cfg["biomarker_batch_maxsize"],
+    _cfg["item_biomarkers_ttl"],
+    _cfg["item_biomarkers_maxsize"],
     _cfg["freshness_ttl"],
     _cfg["user_activity_debounce"],
 )
@@ -367,7 +559,10 @@ def clear_all_caches() -> None:
     catalog_meta_cache.clear()
     optimization_cache.clear()
     optimization_context_cache.clear()
+    candidate_cache.clear()
+    bonus_price_cache.clear()
     biomarker_batch_cache.clear()
+    item_biomarker_cache.clear()
     freshness_cache.clear()
     user_activity_debouncer.clear()
 
@@ -44,10 +44,16 @@ class Settings(BaseSettings):
     cache_catalog_meta_ttl: int = Field(default=300, alias="CACHE_CATALOG_META_TTL")
     cache_optimization_ttl: int = Field(default=3600, alias="CACHE_OPTIMIZATION_TTL")
     cache_optimization_maxsize: int = Field(default=1000, alias="CACHE_OPTIMIZATION_MAXSIZE")
+    cache_candidates_ttl: int = Field(default=60, alias="CACHE_CANDIDATES_TTL")
+    cache_bonus_prices_ttl: int = Field(default=300, alias="CACHE_BONUS_PRICES_TTL")
     cache_biomarker_batch_ttl: int = Field(default=600, alias="CACHE_BIOMARKER_BATCH_TTL")
     cache_biomarker_batch_maxsize: int = Field(
         default=2000, alias="CACHE_BIOMARKER_BATCH_MAXSIZE"
     )
+    cache_item_biomarkers_ttl: int = Field(default=600, alias="CACHE_ITEM_BIOMARKERS_TTL")
+    cache_item_biomarkers_maxsize: int = Field(
+        default=10000, alias="CACHE_ITEM_BIOMARKERS_MAXSIZE"
+    )
     cache_freshness_ttl: int = Field(default=300, alias="CACHE_FRESHNESS_TTL")
     cache_user_activity_debounce: int = Field(default=60, alias="CACHE_USER_ACTIVITY_DEBOUNCE")
 
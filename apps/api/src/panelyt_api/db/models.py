@@ -29,6 +29,10 @@ JSON_TYPE = JSON().with_variant(JSONB, "postgresql")
 
 class Biomarker(Base):
     __tablename__ = "biomarker"
+    __table_args__ = (
+        Index("idx_biomarker_name", "name"),
+        CheckConstraint("name = trim(name)", name="biomarker_name_trimmed_check"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     elab_code: Mapped[str | None] = mapped_column(String(64), unique=True, nullable=True)
@@ -165,6 +169,13 @@ class InstitutionItem(Base):
             "price_now_grosz",
             postgresql_where=text("is_available = true AND price_now_grosz > 0"),
         ),
+        Index(
+            "idx_institution_item_bonus",
+            "institution_id",
+            "item_id",
+            postgresql_include=["price_now_grosz"],
+            postgresql_where=text("is_available = true AND price_now_grosz > 0"),
+        ),
     )
 
     institution_id: Mapped[int] = mapped_column(
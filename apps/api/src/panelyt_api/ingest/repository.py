@@ -34,7 +34,9 @@ def _truncate(value: str | None, length: int) -> str | None:
     trimmed = value.strip()
     if len(trimmed) <= length:
         return trimmed
-    return trimmed[:length]
+    # Trim again after the cut: a slice can end on whitespace, and biomarker
+    # names must stay trimmed (biomarker_name_trimmed_check).
+    return trimmed[:length].rstrip()
 
 
 class CatalogRepository:
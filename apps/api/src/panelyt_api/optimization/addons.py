@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import math
+import heapq
 from collections.abc import Awaitable, Callable, Mapping, Sequence
 from dataclasses import dataclass
 
@@ -10,6 +10,7 @@ from panelyt_api.optimization.context import (
     OptimizationContext,
     ResolvedBiomarker,
 )
+from panelyt_api.optimization.cover import INFEASIBLE_COST, build_coverage_masks
 from panelyt_api.schemas.common import ItemOut
 from panelyt_api.schemas.optimize import AddonBiomarker, AddonSuggestion
 from panelyt_api.utils.normalization import normalize_token
@@ -20,7 +21,7 @@ ADDON_CANDIDATE_POOL_SIZE = 10
 
 @dataclass(slots=True)
 class AddonDependencies:
-    minimal_cover_subset: Callable[[set[str], Sequence[CandidateItem]], tuple[float, set[int]]]
+    minimal_cover_subset: Callable[[set[str], Sequence[CandidateItem]], tuple[int, set[int]]]
     expand_requested_tokens_raw: Callable[[Sequence[str]], set[str]]
     get_all_biomarkers_for_items: Callable[
         [list[int]], Awaitable[tuple[dict[int, list[str]], dict[str, str]]]
@@ -53,49 +54,69 @@ async def compute_addon_suggestions(
     chosen_items_list = list(chosen_items)
     chosen_total_grosz = sum(item.price_now for item in chosen_items_list)
     chosen_by_id = {item.id: item for item in chosen_items_list}
-    baseline_coverage: set[str] = set()
-    for item in chosen_items_list:
-        baseline_coverage.update(
-            token for token in item.coverage if token in selected_tokens
-        )
-
     chosen_ids = set(chosen_by_id.keys())
 
+    # Coverage comparisons run on the context's bitmasks, restricted to the
+    # selected tokens; sets of names are only decoded for the cover search.
+    masks = context.coverage_masks
+    if masks is None or not chosen_ids.issubset(masks.item_masks):
+        masks = build_coverage_masks([*context.candidates, *chosen_items_list])
+    item_masks = masks.item_masks
+    bit_tokens = {bit: token for token, bit in masks.token_bits.items()}
+    selected_mask = 0
+    for token in selected_tokens:
+        selected_mask |= masks.token_bits.get(token, 0)
+    chosen_masks = {item.id: item_masks[item.id] & selected_mask for item in chosen_items_list}
+    baseline_mask = 0
+    for mask in chosen_masks.values():
+        baseline_mask |= mask
+
+    pool_size = max(ADDON_SUGGESTION_LIMIT, ADDON_CANDIDATE_POOL_SIZE)
+    # Negated estimated totals of the best ``pool_size`` computations so far.
+    pool_totals: list[int] = []
     computations: list[AddonComputation] = []
     for candidate in context.candidates:
         if candidate.kind != "package" and not candidate.is_synthetic_package:
             continue
         if candidate.id in chosen_ids:
             continue
-        covered_tokens = set(candidate.coverage) & selected_tokens
-        if len(covered_tokens) < 2:
+        candidate_mask = item_masks[candidate.id] & selected_mask
+        if candidate_mask.bit_count() < 2:
             continue
+        if len(pool_totals) >= pool_size:
+            # The dropped items all overlap the candidate and re-adding never
+            # costs less than zero, so this bounds the total from below; a
+            # candidate that cannot reach the pool skips the cover searches.
+            max_drop_cost = sum(
+                chosen_by_id[item_id].price_now
+                for item_id, mask in chosen_masks.items()
+                if mask & candidate_mask
+            )
+            lower_bound = chosen_total_grosz - max_drop_cost + candidate.price_now
+            if lower_bound > -pool_totals[0]:
+                continue
+        covered_tokens = _mask_tokens(candidate_mask, bit_tokens)
         drop_cost, drop_ids = deps.minimal_cover_subset(covered_tokens, chosen_items_list)
-        if math.isinf(drop_cost) or not drop_ids:
+        if drop_cost == INFEASIBLE_COST or not drop_ids:
             continue
 
-        remaining_coverage: set[str] = set()
-        for item in chosen_items_list:
-            if item.id in drop_ids:
-                continue
-            remaining_coverage.update(
-                token for token in item.coverage if token in selected_tokens
-            )
-
-        candidate_tokens = {token for token in candidate.coverage if token in selected_tokens}
-        covered_after = remaining_coverage | candidate_tokens
-        missing_tokens = baseline_coverage - covered_after
+        covered_after = candidate_mask
+        for item_id, mask in chosen_masks.items():
+            if item_id not in drop_ids:
+                covered_after |= mask
+        missing_mask = baseline_mask & ~covered_after
 
-        if missing_tokens:
+        if missing_mask:
+            missing_tokens = _mask_tokens(missing_mask, bit_tokens)
             replacement_candidates = [
                 item
                 for item in context.candidates
                 if item.id not in drop_ids
                 and item.id != candidate.id
-                and item.coverage & missing_tokens
+                and item_masks[item.id] & missing_mask
             ]
             readd_cost, _ = deps.minimal_cover_subset(missing_tokens, replacement_candidates)
-            if math.isinf(readd_cost):
+            if readd_cost == INFEASIBLE_COST:
                 continue
         else:
             readd_cost = 0
@@ -107,12 +128,16 @@ async def compute_addon_suggestions(
             AddonComputation(
                 candidate=candidate,
                 covered_tokens=covered_tokens,
-                drop_cost_grosz=int(drop_cost),
-                readd_cost_grosz=int(readd_cost),
-                estimated_total_grosz=int(estimated_total),
+                drop_cost_grosz=drop_cost,
+                readd_cost_grosz=readd_cost,
+                estimated_total_grosz=estimated_total,
                 dropped_item_ids=drop_ids,
             )
         )
+        if len(pool_totals) < pool_size:
+            heapq.heappush(pool_totals, -estimated_total)
+        elif estimated_total < -pool_totals[0]:
+            heapq.heapreplace(pool_totals, -estimated_total)
 
     if not computations:
         return [], {}
@@ -124,7 +149,6 @@ async def compute_addon_suggestions(
             entry.candidate.id,
         )
     )
-    pool_size = max(ADDON_SUGGESTION_LIMIT, ADDON_CANDIDATE_POOL_SIZE)
     candidate_pool = computations[:pool_size]
     package_ids = [entry.candidate.id for entry in candidate_pool]
     if not package_ids:
@@ -147,43 +171,41 @@ async def compute_addon_suggestions(
     resolved_labels = deps.token_display_map(context.resolved)
     combined_labels = {**resolved_labels, **existing_labels}
 
+    # Bonus tokens are normalized once here; the suggestion loop reuses the
+    # keys when pricing what each candidate adds.
     all_bonus_tokens: dict[str, str] = {}
+    bonus_keys: dict[str, str] = {}
     for entry in candidate_pool:
         item = entry.candidate
         biomarkers = biomarkers_map.get(item.id, [])
         for token in biomarkers:
-            if token not in selected_tokens:
+            if token not in selected_tokens and token not in bonus_keys:
                 normalized = normalize_token(token)
                 if normalized:
+                    bonus_keys[token] = normalized
                     all_bonus_tokens.setdefault(normalized, token)
 
+    # Must follow the item biomarker fetch; see bonus_price_map.
     bonus_price_map: dict[str, int] = {}
     if all_bonus_tokens:
         bonus_price_map = await deps.bonus_price_map(all_bonus_tokens, institution_id)
 
-    bonus_current: set[str] = set()
-    for item_id in chosen_ids:
-        for token in biomarkers_map.get(item_id, []):
-            if token not in selected_tokens:
-                bonus_current.add(token)
+    # Each chosen item's bonus tokens are computed once and reused for every
+    # suggestion's before/after comparison.
+    chosen_bonus = {
+        item_id: frozenset(biomarkers_map.get(item_id, ())).difference(selected_tokens)
+        for item_id in chosen_ids
+    }
+    bonus_current: set[str] = set().union(*chosen_bonus.values())
 
     suggestions: list[AddonSuggestion] = []
     for entry in candidate_pool:
         item = entry.candidate
         biomarkers = sorted(biomarkers_map.get(item.id, []))
-        remaining_ids = [
-            item_id for item_id in chosen_ids if item_id not in entry.dropped_item_ids
-        ]
-        bonus_remaining = {
-            token
-            for remaining_id in remaining_ids
-            for token in biomarkers_map.get(remaining_id, [])
-            if token not in selected_tokens
-        }
-        candidate_bonus_tokens = {
-            token for token in biomarkers if token not in selected_tokens
-        }
-        bonus_after = bonus_remaining | candidate_bonus_tokens
+        bonus_after = set(biomarkers).difference(selected_tokens)
+        for item_id, bonus in chosen_bonus.items():
+            if item_id not in entry.dropped_item_ids:
+                bonus_after |= bonus
         bonus_removed = bonus_current - bonus_after
         bonus_kept = bonus_current & bonus_after
         bonus_added = bonus_after - bonus_current
@@ -240,11 +262,9 @@ async def compute_addon_suggestions(
             for token in sorted(bonus_kept)
         ]
 
-        extra_tokens: list[str] = []
-        for addon_entry in adds:
-            normalized = normalize_token(addon_entry.code)
-            if normalized:
-                extra_tokens.append(normalized)
+        extra_tokens = [
+            bonus_keys[addon_entry.code] for addon_entry in adds if addon_entry.code in bonus_keys
+        ]
 
         if extra_tokens:
             singles_total = 0
@@ -276,3 +296,12 @@ async def compute_addon_suggestions(
             break
 
     return suggestions, additional_labels
+
+
+def _mask_tokens(mask: int, bit_tokens: Mapping[int, str]) -> set[str]:
+    tokens: set[str] = set()
+    while mask:
+        lowest = mask & -mask
+        tokens.add(bit_tokens[lowest])
+        mask ^= lowest
+    return tokens
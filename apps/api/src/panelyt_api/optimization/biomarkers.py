@@ -1,22 +1,81 @@
 from __future__ import annotations
 
 from collections.abc import Mapping, Sequence
+from sys import intern
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import BindParameter, bindparam, func, or_, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from panelyt_api.core.cache import bonus_price_cache, item_biomarker_cache
 from panelyt_api.db import models
 from panelyt_api.optimization.context import CandidateItem, ResolvedBiomarker
-from panelyt_api.optimization.synthetic_packages import (
-    SyntheticPackage,
-    load_diag_synthetic_packages,
-)
+from panelyt_api.optimization.synthetic_packages import load_synthetic_package_index
 from panelyt_api.utils.normalization import (
-    create_normalized_lookup,
     normalize_token,
     normalize_tokens_set,
 )
 
+ROW_BATCH_SIZE = 2000
+ITEM_ID_BATCH_SIZE = 500
+
+# The hot statements below are built once at import; calls only bind values to
+# their expanding parameters, so SQLAlchemy skips rebuilding the construct and
+# serves the compiled form from its statement cache.
+
+# NULLIF keeps the empty-string fallthrough of ``elab_code or slug or name``.
+_ITEM_TOKEN_COLUMN = func.coalesce(
+    func.nullif(models.Biomarker.elab_code, ""),
+    func.nullif(models.Biomarker.slug, ""),
+    func.nullif(models.Biomarker.name, ""),
+).label("token")
+_ITEM_BIOMARKERS_STATEMENT = (
+    select(models.ItemBiomarker.item_id, _ITEM_TOKEN_COLUMN, models.Biomarker.name)
+    .join(models.Biomarker, models.Biomarker.id == models.ItemBiomarker.biomarker_id)
+    .where(_ITEM_TOKEN_COLUMN.is_not(None))
+    .where(models.ItemBiomarker.item_id.in_(bindparam("item_ids", expanding=True)))
+    # Each item's tokens arrive sorted, so the lists (and the first label seen
+    # per token) are deterministic and the response's final sort is linear.
+    .order_by(models.ItemBiomarker.item_id, _ITEM_TOKEN_COLUMN)
+    .execution_options(yield_per=ROW_BATCH_SIZE)
+)
+
+# One IN per column lets each branch use that column's own index instead of a
+# disjunction across all three; duplicates collapse in the GROUP BY. The
+# branches share a single expanding parameter so the token list is bound once
+# rather than once per column.
+_RAW_TOKENS_PARAM: BindParameter[list[str]] = bindparam("raw_tokens", expanding=True)
+_BONUS_MATCHING_IDS = union_all(
+    select(models.Biomarker.id).where(models.Biomarker.elab_code.in_(_RAW_TOKENS_PARAM)),
+    select(models.Biomarker.id).where(models.Biomarker.slug.in_(_RAW_TOKENS_PARAM)),
+    select(models.Biomarker.id).where(models.Biomarker.name.in_(_RAW_TOKENS_PARAM)),
+).subquery()
+_BONUS_PRICES_STATEMENT = (
+    select(
+        models.InstitutionItem.institution_id,
+        models.Biomarker.elab_code,
+        models.Biomarker.slug,
+        models.Biomarker.name,
+        func.min(models.InstitutionItem.price_now_grosz).label("min_price"),
+    )
+    .select_from(models.Biomarker)
+    .join(_BONUS_MATCHING_IDS, _BONUS_MATCHING_IDS.c.id == models.Biomarker.id)
+    .join(models.ItemBiomarker, models.ItemBiomarker.biomarker_id == models.Biomarker.id)
+    .join(models.Item, models.Item.id == models.ItemBiomarker.item_id)
+    .join(
+        models.InstitutionItem,
+        (models.InstitutionItem.item_id == models.Item.id)
+        & models.InstitutionItem.institution_id.in_(
+            bindparam("institution_ids", expanding=True)
+        ),
+    )
+    .where(models.Item.kind == "single")
+    .where(models.InstitutionItem.is_available.is_(True))
+    .where(models.InstitutionItem.price_now_grosz > 0)
+    # The other biomarker columns depend functionally on the primary key.
+    .group_by(models.InstitutionItem.institution_id, models.Biomarker.id)
+    .execution_options(yield_per=ROW_BATCH_SIZE)
+)
+
 
 def token_display_map(resolved: Sequence[ResolvedBiomarker]) -> dict[str, str]:
     return {
@@ -40,11 +99,10 @@ def apply_synthetic_coverage_overrides(
 def expand_synthetic_panel_biomarkers(
     biomarkers_by_item: dict[int, list[str]],
 ) -> None:
-    synthetic_packages = load_diag_synthetic_packages()
-    if not synthetic_packages or not biomarkers_by_item:
+    if not biomarkers_by_item:
         return
 
-    panel_components = panel_components_by_code(synthetic_packages)
+    panel_components = load_synthetic_package_index().panel_components
     if not panel_components:
         return
 
@@ -70,30 +128,11 @@ def expand_synthetic_panel_biomarkers(
         biomarkers_by_item[item_id] = expanded
 
 
-def panel_components_by_code(
-    synthetic_packages: Sequence[SyntheticPackage],
-) -> dict[str, tuple[str, ...]]:
-    panel_components: dict[str, tuple[str, ...]] = {}
-    for mapping in synthetic_packages:
-        panel_code = mapping.panel_elab_code
-        if not panel_code or not mapping.component_elab_codes:
-            continue
-        normalized_panel = normalize_token(panel_code)
-        if not normalized_panel:
-            continue
-        panel_components[normalized_panel] = mapping.component_elab_codes
-    return panel_components
-
-
 def expand_requested_tokens(requested_tokens: Sequence[str]) -> set[str]:
     if not requested_tokens:
         return set()
 
-    synthetic_packages = load_diag_synthetic_packages()
-    if not synthetic_packages:
-        return normalize_tokens_set(list(requested_tokens))
-
-    panel_components = panel_components_by_code(synthetic_packages)
+    panel_components = load_synthetic_package_index().panel_components
     if not panel_components:
         return normalize_tokens_set(list(requested_tokens))
 
@@ -112,11 +151,7 @@ def expand_requested_tokens_raw(requested_tokens: Sequence[str]) -> set[str]:
     if not requested_tokens:
         return set()
 
-    synthetic_packages = load_diag_synthetic_packages()
-    if not synthetic_packages:
-        return set(requested_tokens)
-
-    panel_components = panel_components_by_code(synthetic_packages)
+    panel_components = load_synthetic_package_index().panel_components
     if not panel_components:
         return set(requested_tokens)
 
@@ -153,8 +188,10 @@ async def augment_labels_for_tokens(
             )
         )
     )
-    rows = (await session.execute(statement)).all()
-    for elab_code, slug, name in rows:
+    rows = await session.stream(statement.execution_options(yield_per=ROW_BATCH_SIZE))
+    async for elab_code, slug, name in rows:
+        # trim() in biomarker_name_trimmed_check only removes spaces, so tabs
+        # and newlines can still reach the label.
         display_name = (name or "").strip()
         if not display_name:
             continue
@@ -166,96 +203,135 @@ async def augment_labels_for_tokens(
 async def get_all_biomarkers_for_items(
     session: AsyncSession, item_ids: list[int]
 ) -> tuple[dict[int, list[str]], dict[str, str]]:
-    """Fetch biomarkers for items and provide display labels."""
+    """Fetch biomarkers for items and provide display labels.
+
+    Every requested item id is a key of the returned map; items without
+    biomarkers map to an empty list. Per-item results are cached, so only
+    items not loaded recently are queried.
+    """
     if not item_ids:
         return {}, {}
 
-    statement = (
-        select(
-            models.ItemBiomarker.item_id,
-            models.Biomarker.elab_code,
-            models.Biomarker.slug,
-            models.Biomarker.name,
-        )
-        .join(models.Biomarker, models.Biomarker.id == models.ItemBiomarker.biomarker_id)
-        .where(models.ItemBiomarker.item_id.in_(item_ids))
-    )
-
-    rows = (await session.execute(statement)).all()
-    result: dict[int, list[str]] = {}
+    # Seeding every key up front sizes the dict once and turns the per-row
+    # insert into a plain lookup.
+    result: dict[int, list[str]] = {item_id: [] for item_id in item_ids}
     labels: dict[str, str] = {}
-    for item_id, elab_code, slug, name in rows:
-        token = elab_code or slug or name
-        if not token:
-            continue
-        display_name = (name or "").strip()
-        if display_name:
-            labels.setdefault(token, display_name)
-        result.setdefault(item_id, []).append(token)
-
+    set_label = labels.setdefault
+    cached, missing = item_biomarker_cache.get_many(result)
+    for item_id, entries in cached.items():
+        tokens = result[item_id]
+        for token, name in entries:
+            if name:
+                set_label(token, name)
+            tokens.append(token)
+    if not missing:
+        return result, labels
+
+    loaded: dict[int, list[tuple[str, str | None]]] = {item_id: [] for item_id in missing}
+    # The statement selects plain columns, so it runs on the session's Core
+    # connection and skips ORM compile and result processing per row.
+    connection = await session.connection()
+    # Fixed-size IN lists keep planning cost bounded and let the driver reuse
+    # prepared statements for large selections.
+    for start in range(0, len(missing), ITEM_ID_BATCH_SIZE):
+        batch = missing[start : start + ITEM_ID_BATCH_SIZE]
+        rows = await connection.stream(_ITEM_BIOMARKERS_STATEMENT, {"item_ids": batch})
+        async for item_id, raw_token, name in rows:
+            # The same token repeats across many items; intern it so every
+            # list shares one string.
+            token = intern(raw_token)
+            # Cached entries keep the stripped name, so hits skip this.
+            display_name = (name or "").strip()
+            if display_name:
+                set_label(token, display_name)
+            result[item_id].append(token)
+            loaded[item_id].append((token, display_name or None))
+
+    item_biomarker_cache.set_many(
+        {item_id: tuple(entries) for item_id, entries in loaded.items()}
+    )
     return result, labels
 
 
 async def bonus_price_map(
     session: AsyncSession, tokens: Mapping[str, str], institution_id: int
 ) -> dict[str, int]:
-    """Return the best-known single-test price (in grosz) for each normalized token."""
-    if not tokens:
-        return {}
+    """Return the best-known single-test price (in grosz) for each normalized token.
+
+    Bonus tokens are the chosen items' biomarkers outside the request, so
+    callers can only price them after ``get_all_biomarkers_for_items``.
+    """
+    prices = await bonus_price_maps(session, tokens, [institution_id])
+    return prices.get(institution_id, {})
+
 
-    normalized_lookup = create_normalized_lookup(tokens)
-    raw_tokens = {value.strip() for value in tokens.values() if value.strip()}
-    if not raw_tokens or not normalized_lookup:
+async def bonus_price_maps(
+    session: AsyncSession, tokens: Mapping[str, str], institution_ids: Sequence[int]
+) -> dict[int, dict[str, int]]:
+    """Return ``bonus_price_map`` results for several institutions in one query.
+
+    Institutions without any priced token are omitted from the result.
+    """
+    if not tokens or not institution_ids:
         return {}
 
-    statement = (
-        select(
-            models.Biomarker.elab_code,
-            models.Biomarker.slug,
-            models.Biomarker.name,
-            func.min(models.InstitutionItem.price_now_grosz).label("min_price"),
-        )
-        .select_from(models.Biomarker)
-        .join(models.ItemBiomarker, models.ItemBiomarker.biomarker_id == models.Biomarker.id)
-        .join(models.Item, models.Item.id == models.ItemBiomarker.item_id)
-        .join(
-            models.InstitutionItem,
-            (models.InstitutionItem.item_id == models.Item.id)
-            & (models.InstitutionItem.institution_id == institution_id),
-        )
-        .where(models.Item.kind == "single")
-        .where(models.InstitutionItem.is_available.is_(True))
-        .where(models.InstitutionItem.price_now_grosz > 0)
-        .where(
-            or_(
-                models.Biomarker.elab_code.in_(raw_tokens),
-                models.Biomarker.slug.in_(raw_tokens),
-                models.Biomarker.name.in_(raw_tokens),
-            )
-        )
-        .group_by(
-            models.Biomarker.id,
-            models.Biomarker.elab_code,
-            models.Biomarker.slug,
-            models.Biomarker.name,
-        )
+    # Every spelling a row can carry, raw or normalized, mapped to the caller's
+    # key. Rows match the raw tokens exactly, so columns usually resolve with
+    # a single lookup and are only normalized on a miss. The mapping is walked
+    # once; later keys win for a shared spelling, as in create_normalized_lookup.
+    normalized_lookup: dict[str, str] = {}
+    raw_to_normalized: dict[str, str] = {}
+    for token_key, value in tokens.items():
+        raw = value.strip()
+        lowered = normalize_token(raw)
+        if lowered:
+            normalized_lookup[lowered] = token_key
+            raw_to_normalized[raw] = lowered
+    if not raw_to_normalized:
+        return {}
+    variant_to_key = dict(normalized_lookup)
+    for raw, lowered in raw_to_normalized.items():
+        variant_to_key[raw] = normalized_lookup[lowered]
+
+    rows = await session.stream(
+        _BONUS_PRICES_STATEMENT,
+        {
+            "raw_tokens": sorted(raw_to_normalized),
+            "institution_ids": list(institution_ids),
+        },
     )
+    price_maps: dict[int, dict[str, int]] = {}
 
-    rows = (await session.execute(statement)).all()
-    price_map: dict[str, int] = {}
-
-    for elab_code, slug, name, min_price in rows:
+    async for institution_id, elab_code, slug, name, min_price in rows:
         for candidate in (elab_code, slug, name):
             if not candidate:
                 continue
-            normalized = normalize_token(candidate)
-            key = normalized_lookup.get(normalized) if normalized else None
+            key = variant_to_key.get(candidate)
+            if key is None:
+                normalized = normalize_token(candidate)
+                key = variant_to_key.get(normalized) if normalized else None
             if key is None:
                 continue
             price_value = int(min_price or 0)
+            price_map = price_maps.setdefault(institution_id, {})
             existing = price_map.get(key)
             if existing is None or price_value < existing:
                 price_map[key] = price_value
             break
 
-    return price_map
+    return price_maps
+
+
+async def bonus_price_map_cached(
+    session: AsyncSession, tokens: Mapping[str, str], institution_id: int
+) -> dict[str, int]:
+    """Return ``bonus_price_map`` results cached per institution and token mapping."""
+    if not tokens:
+        return {}
+    cache_key = bonus_price_cache.make_key(tokens, institution_id)
+    cached = bonus_price_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    prices = await bonus_price_map(session, tokens, institution_id)
+    bonus_price_cache.set(cache_key, prices)
+    return prices
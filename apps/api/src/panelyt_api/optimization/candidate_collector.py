@@ -1,20 +1,44 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
+from typing import Any
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import (
+    ColumnElement,
+    CompoundSelect,
+    Row,
+    Select,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from panelyt_api.db import models
 from panelyt_api.optimization.context import CandidateItem, ResolvedBiomarker
 from panelyt_api.optimization.synthetic_packages import (
     SyntheticPackage,
-    load_diag_synthetic_packages,
+    load_synthetic_package_index,
 )
-from panelyt_api.utils.normalization import create_normalized_lookup, normalize_token
+from panelyt_api.utils.normalization import create_normalized_lookup
 
 PRICE_HISTORY_LOOKBACK_DAYS = 30
+CANDIDATE_ROW_PARTITION_SIZE = 1000
+
+_BIOMARKER_SOURCE = "biomarker"
+_SYNTHETIC_SOURCE = "synthetic"
+
+
+@dataclass(slots=True)
+class _SyntheticMatches:
+    by_external: dict[str, SyntheticPackage] = field(default_factory=dict)
+    by_slug: dict[str, SyntheticPackage] = field(default_factory=dict)
+    tokens: dict[SyntheticPackage, set[str]] = field(default_factory=dict)
 
 
 class CandidateCollector:
@@ -28,35 +52,77 @@ class CandidateCollector:
         if not biomarker_ids:
             return []
 
-        panel_ids, panel_components_by_id = await self._collect_synthetic_panel_aliases(
-            biomarkers
+        selected_lookup = create_normalized_lookup(
+            {entry.token: entry.token for entry in biomarkers}
+        )
+        panel_components_by_code = self._collect_synthetic_panel_aliases(selected_lookup)
+        synthetic_matches = self._match_synthetic_packages(selected_lookup)
+
+        # Items are matched either directly by requested biomarker or through a
+        # synthetic panel biomarker whose elab code expands to requested tokens.
+        biomarker_filter: ColumnElement[bool] = models.ItemBiomarker.biomarker_id.in_(
+            biomarker_ids
         )
-        if panel_ids:
-            biomarker_ids = list({*biomarker_ids, *panel_ids})
+        if panel_components_by_code:
+            biomarker_filter = or_(
+                biomarker_filter,
+                models.Biomarker.elab_code.in_(list(panel_components_by_code.keys())),
+            )
+        synthetic_filters = []
+        if synthetic_matches.by_external:
+            synthetic_filters.append(
+                models.Item.external_id.in_(list(synthetic_matches.by_external.keys()))
+            )
+        if synthetic_matches.by_slug:
+            synthetic_filters.append(
+                models.Item.slug.in_(list(synthetic_matches.by_slug.keys()))
+            )
 
+        candidate_item_ids: Select[Any] | CompoundSelect = (
+            select(models.ItemBiomarker.item_id)
+            .join(models.Biomarker, models.Biomarker.id == models.ItemBiomarker.biomarker_id)
+            .where(biomarker_filter)
+        )
+        if synthetic_filters:
+            candidate_item_ids = union_all(
+                candidate_item_ids,
+                select(models.Item.id).where(or_(*synthetic_filters)),
+            )
         window_start = datetime.now(UTC).date() - timedelta(
             days=PRICE_HISTORY_LOOKBACK_DAYS
         )
+        # Grouped once per candidate item and joined on item_id, so the minimum
+        # is not recomputed for every matched biomarker row of the same item.
         history = (
             select(
-                models.PriceSnapshot.item_id.label("item_id"),
+                models.PriceSnapshot.item_id,
                 func.min(models.PriceSnapshot.price_now_grosz).label("hist_min"),
             )
-            .where(models.PriceSnapshot.snap_date >= window_start)
             .where(models.PriceSnapshot.institution_id == institution_id)
+            .where(models.PriceSnapshot.snap_date >= window_start)
+            .where(models.PriceSnapshot.item_id.in_(candidate_item_ids))
             .group_by(models.PriceSnapshot.item_id)
-            .subquery()
+            .subquery("history")
+        )
+        offer_columns = (
+            models.Item.id.label("item_id"),
+            models.Item.kind,
+            models.Item.name,
+            models.Item.slug,
+            models.Item.external_id,
+            models.InstitutionItem.price_now_grosz,
+            models.InstitutionItem.price_min30_grosz,
+            models.InstitutionItem.sale_price_grosz,
+            models.InstitutionItem.regular_price_grosz,
+            history.c.hist_min,
         )
 
-        statement = (
+        statement: Select[Any] | CompoundSelect = (
             select(
-                models.Item,
-                models.InstitutionItem,
+                literal(_BIOMARKER_SOURCE).label("source"),
+                *offer_columns,
                 models.ItemBiomarker.biomarker_id,
                 models.Biomarker.elab_code,
-                models.Biomarker.slug,
-                models.Biomarker.name,
-                history.c.hist_min,
             )
             .join(
                 models.InstitutionItem,
@@ -66,205 +132,146 @@ class CandidateCollector:
             .join(models.ItemBiomarker, models.Item.id == models.ItemBiomarker.item_id)
             .join(models.Biomarker, models.Biomarker.id == models.ItemBiomarker.biomarker_id)
             .outerjoin(history, history.c.item_id == models.Item.id)
-            .where(models.ItemBiomarker.biomarker_id.in_(biomarker_ids))
+            .where(biomarker_filter)
             .where(models.InstitutionItem.is_available.is_(True))
             .where(models.InstitutionItem.price_now_grosz > 0)
         )
 
-        rows = (await self.session.execute(statement)).all()
-        by_id: dict[int, CandidateItem] = {}
-        id_to_token = {b.id: b.token for b in biomarkers}
-        for (
-            item,
-            offer,
-            biomarker_id,
-            _elab_code,
-            _slug,
-            _name,
-            hist_min,
-        ) in rows:
-            candidate = by_id.get(item.id)
-            if candidate is None:
-                candidate = CandidateItem(
-                    id=item.id,
-                    kind=item.kind,
-                    name=item.name,
-                    slug=item.slug,
-                    external_id=item.external_id,
-                    price_now=offer.price_now_grosz,
-                    price_min30=self._resolve_price_floor(
-                        hist_min, offer.price_min30_grosz, offer.price_now_grosz
-                    ),
-                    sale_price=offer.sale_price_grosz,
-                    regular_price=offer.regular_price_grosz,
+        if synthetic_filters:
+            synthetic_statement = (
+                select(
+                    literal(_SYNTHETIC_SOURCE).label("source"),
+                    *offer_columns,
+                    null().label("biomarker_id"),
+                    null().label("elab_code"),
                 )
-                by_id[item.id] = candidate
-            panel_components = panel_components_by_id.get(biomarker_id)
-            if panel_components:
-                candidate.coverage.update(panel_components)
-            token = id_to_token.get(biomarker_id)
-            if token:
-                candidate.coverage.add(token)
-        await self._apply_synthetic_packages(
-            by_id, biomarkers, institution_id, history
-        )
+                .join(
+                    models.InstitutionItem,
+                    (models.InstitutionItem.item_id == models.Item.id)
+                    & (models.InstitutionItem.institution_id == institution_id),
+                )
+                .outerjoin(history, history.c.item_id == models.Item.id)
+                .where(or_(*synthetic_filters))
+                .where(models.InstitutionItem.is_available.is_(True))
+                .where(models.InstitutionItem.price_now_grosz > 0)
+            )
+            statement = union_all(statement, synthetic_statement)
+
+        by_id: dict[int, CandidateItem] = {}
+        synthetic_rows: list[Row[Any]] = []
+        # Biomarker ids are sparse database keys, so dict lookups stay; the
+        # bound methods are hoisted out of the per-row loop.
+        token_for_id = {b.id: b.token for b in biomarkers}.get
+        components_for_code = panel_components_by_code.get
+        candidate_for_id = by_id.get
+        # Stream the rows in partitions so large joins are folded into
+        # candidates without materializing the whole result first.
+        result = await self.session.stream(statement)
+        async for partition in result.partitions(CANDIDATE_ROW_PARTITION_SIZE):
+            for row in partition:
+                if row.source == _SYNTHETIC_SOURCE:
+                    synthetic_rows.append(row)
+                    continue
+                item_id = row.item_id
+                candidate = candidate_for_id(item_id)
+                if candidate is None:
+                    candidate = self._candidate_from_row(row)
+                    by_id[item_id] = candidate
+                panel_components = components_for_code(row.elab_code) if row.elab_code else None
+                if panel_components:
+                    candidate.coverage.update(panel_components)
+                token = token_for_id(row.biomarker_id)
+                if token:
+                    candidate.coverage.add(token)
+        self._apply_synthetic_packages(by_id, synthetic_rows, synthetic_matches)
         return list(by_id.values())
 
-    async def _collect_synthetic_panel_aliases(
-        self, biomarkers: Sequence[ResolvedBiomarker]
-    ) -> tuple[set[int], dict[int, set[str]]]:
-        synthetic_packages = load_diag_synthetic_packages()
-        if not synthetic_packages or not biomarkers:
-            return set(), {}
+    def _collect_synthetic_panel_aliases(
+        self, selected_lookup: Mapping[str, Any]
+    ) -> dict[str, set[str]]:
+        """Map synthetic panel elab codes to components when any is requested."""
+        index = load_synthetic_package_index()
+        if not index.packages or not selected_lookup:
+            return {}
 
-        selected_lookup = create_normalized_lookup(
-            {entry.token: entry.token for entry in biomarkers}
-        )
         panel_components_by_code: dict[str, set[str]] = {}
-        for mapping in synthetic_packages:
+        for mapping in index.packages:
             panel_code = mapping.panel_elab_code
             if not panel_code:
                 continue
-            tokens_all = {
-                normalized
-                for code in mapping.component_elab_codes
-                if (normalized := normalize_token(code)) is not None
-            }
-            if not tokens_all:
-                continue
-            if not any(selected_lookup.get(token) for token in tokens_all):
+            if mapping.normalized_components.isdisjoint(selected_lookup):
                 continue
             panel_components_by_code.setdefault(panel_code, set()).update(
                 mapping.component_elab_codes
             )
+        return panel_components_by_code
 
-        if not panel_components_by_code:
-            return set(), {}
-
-        statement = select(models.Biomarker.id, models.Biomarker.elab_code).where(
-            models.Biomarker.elab_code.in_(list(panel_components_by_code.keys()))
-        )
-        rows = (await self.session.execute(statement)).all()
-        panel_ids: set[int] = set()
-        panel_components_by_id: dict[int, set[str]] = {}
-        for biomarker_id, elab_code in rows:
-            panel_ids.add(biomarker_id)
-            components = panel_components_by_code.get(elab_code)
-            if components:
-                panel_components_by_id[biomarker_id] = set(components)
-        return panel_ids, panel_components_by_id
+    def _match_synthetic_packages(
+        self, selected_lookup: Mapping[str, Any]
+    ) -> _SyntheticMatches:
+        """Select synthetic packages covering at least one requested token."""
+        matches = _SyntheticMatches()
+        index = load_synthetic_package_index()
+        if not index.packages or not selected_lookup:
+            return matches
 
-    async def _apply_synthetic_packages(
-        self,
-        candidates_by_id: dict[int, CandidateItem],
-        biomarkers: Sequence[ResolvedBiomarker],
-        institution_id: int,
-        history_subquery,
-    ) -> None:
-        synthetic_packages = load_diag_synthetic_packages()
-        if not synthetic_packages or not biomarkers:
-            return
-
-        selected_lookup = create_normalized_lookup(
-            {entry.token: entry.token for entry in biomarkers}
-        )
-
-        mapping_by_external: dict[str, SyntheticPackage] = {}
-        mapping_by_slug: dict[str, SyntheticPackage] = {}
-        mapping_tokens: dict[SyntheticPackage, set[str]] = {}
-        for mapping in synthetic_packages:
-            tokens_all: set[str] = set()
-            for code in mapping.component_elab_codes:
-                normalized = normalize_token(code)
-                if not normalized:
-                    continue
-                tokens_all.add(code)
-            if not tokens_all:
-                continue
-            tokens_selected = {
-                token
-                for token in tokens_all
-                if selected_lookup.get(normalize_token(token) or "")
-            }
-            if not tokens_selected:
+        for mapping in index.packages:
+            if mapping.normalized_components.isdisjoint(selected_lookup):
                 continue
-            mapping_tokens[mapping] = tokens_all
+            matches.tokens[mapping] = set(mapping.component_codes)
             if mapping.external_id:
-                mapping_by_external[mapping.external_id] = mapping
+                matches.by_external[mapping.external_id] = mapping
             if mapping.slug:
-                mapping_by_slug[mapping.slug] = mapping
-
-        if not mapping_tokens:
-            return
-
-        external_ids = list(mapping_by_external.keys())
-        slugs = list(mapping_by_slug.keys())
-        if not external_ids and not slugs:
-            return
+                matches.by_slug[mapping.slug] = mapping
+        return matches
 
-        filters = []
-        if external_ids:
-            filters.append(models.Item.external_id.in_(external_ids))
-        if slugs:
-            filters.append(models.Item.slug.in_(slugs))
-
-        statement = (
-            select(
-                models.Item,
-                models.InstitutionItem,
-                history_subquery.c.hist_min,
-            )
-            .join(
-                models.InstitutionItem,
-                (models.InstitutionItem.item_id == models.Item.id)
-                & (models.InstitutionItem.institution_id == institution_id),
-            )
-            .outerjoin(history_subquery, history_subquery.c.item_id == models.Item.id)
-            .where(or_(*filters))
-            .where(models.InstitutionItem.is_available.is_(True))
-            .where(models.InstitutionItem.price_now_grosz > 0)
-        )
-
-        rows = (await self.session.execute(statement)).all()
-        for item, offer, hist_min in rows:
+    def _apply_synthetic_packages(
+        self,
+        candidates_by_id: dict[int, CandidateItem],
+        rows: Sequence[Row[Any]],
+        matches: _SyntheticMatches,
+    ) -> None:
+        for row in rows:
+            item_id = row.item_id
             matched_mapping: SyntheticPackage | None = None
-            if item.external_id in mapping_by_external:
-                matched_mapping = mapping_by_external[item.external_id]
-            elif item.slug in mapping_by_slug:
-                matched_mapping = mapping_by_slug[item.slug]
+            if row.external_id in matches.by_external:
+                matched_mapping = matches.by_external[row.external_id]
+            elif row.slug in matches.by_slug:
+                matched_mapping = matches.by_slug[row.slug]
             if matched_mapping is None:
                 continue
-            tokens = mapping_tokens.get(matched_mapping)
+            tokens = matches.tokens.get(matched_mapping)
             if not tokens:
                 continue
-            candidate = candidates_by_id.get(item.id)
+            candidate = candidates_by_id.get(item_id)
             if candidate is None:
-                candidate = CandidateItem(
-                    id=item.id,
-                    kind=item.kind,
-                    name=item.name,
-                    slug=item.slug,
-                    external_id=item.external_id,
-                    price_now=offer.price_now_grosz,
-                    price_min30=self._resolve_price_floor(
-                        hist_min, offer.price_min30_grosz, offer.price_now_grosz
-                    ),
-                    sale_price=offer.sale_price_grosz,
-                    regular_price=offer.regular_price_grosz,
-                    is_synthetic_package=True,
-                    coverage=set(tokens),
-                )
-                candidates_by_id[item.id] = candidate
-            else:
-                candidate.coverage = set(tokens)
-                candidate.is_synthetic_package = True
+                candidate = self._candidate_from_row(row)
+                candidates_by_id[item_id] = candidate
+            candidate.coverage = set(tokens)
+            candidate.is_synthetic_package = True
+
+    def _candidate_from_row(self, row: Row[Any]) -> CandidateItem:
+        return CandidateItem(
+            id=row.item_id,
+            kind=row.kind,
+            name=row.name,
+            slug=row.slug,
+            external_id=row.external_id,
+            price_now=row.price_now_grosz,
+            price_min30=self._resolve_price_floor(
+                row.hist_min, row.price_min30_grosz, row.price_now_grosz
+            ),
+            sale_price=row.sale_price_grosz,
+            regular_price=row.regular_price_grosz,
+        )
 
     @staticmethod
     def _resolve_price_floor(
         history_price: int | None, rolling_min: int | None, current_price: int
     ) -> int:
+        # Integer columns and MIN() over them already come back as ints.
         if history_price is not None:
-            return int(history_price)
+            return history_price
         if rolling_min is not None:
-            return int(rolling_min)
-        return int(current_price)
+            return rolling_min
+        return current_price
@@ -2,13 +2,21 @@ from __future__ import annotations
 
 from collections.abc import Iterable, Sequence
 
-from panelyt_api.optimization.context import CandidateItem
+from panelyt_api.optimization.context import CandidateItem, CoverageMasks
+from panelyt_api.optimization.cover import build_coverage_masks
 
 MAX_PACKAGE_VARIANTS_PER_COVERAGE = 2
 MAX_SINGLE_VARIANTS_PER_TOKEN = 2
 
 
-def prune_candidates(candidates: Iterable[CandidateItem]) -> list[CandidateItem]:
+def prune_candidates(
+    candidates: Iterable[CandidateItem], masks: CoverageMasks | None = None
+) -> list[CandidateItem]:
+    """Drop surplus single variants and dominated items.
+
+    ``masks`` may cover a superset of ``candidates``; it is built here when
+    not supplied.
+    """
     items = list(candidates)
     if not items:
         return []
@@ -19,7 +27,7 @@ def prune_candidates(candidates: Iterable[CandidateItem]) -> list[CandidateItem]
         for item in items
         if not should_skip_single_candidate(item, allowed_single_ids)
     ]
-    return remove_dominated_candidates(filtered)
+    return remove_dominated_candidates(filtered, masks)
 
 
 def select_single_variants(items: Sequence[CandidateItem]) -> set[int]:
@@ -54,26 +62,35 @@ def should_skip_single_candidate(
     return item.id not in allowed_single_ids
 
 
-def remove_dominated_candidates(items: Sequence[CandidateItem]) -> list[CandidateItem]:
+def remove_dominated_candidates(
+    items: Sequence[CandidateItem], masks: CoverageMasks | None = None
+) -> list[CandidateItem]:
+    # Coverage is compared as bitmasks over the pool's tokens: subset checks
+    # become a single OR instead of hashing every token of both sets.
+    item_masks = (masks or build_coverage_masks(items)).item_masks
     retained: dict[int, CandidateItem] = {}
-    seen_coverages: list[tuple[frozenset[str], int]] = []
-    package_variant_counts: dict[frozenset[str], int] = {}
-    single_variant_counts: dict[frozenset[str], int] = {}
-    ordered = sorted(
-        items,
-        key=lambda item: (
-            -len(item.coverage),
-            item.price_now,
-            item.price_min30,
-            item.id,
-        ),
-    )
+    seen_coverages: list[tuple[int, int]] = []
+    package_variant_counts: dict[int, int] = {}
+    single_variant_counts: dict[int, int] = {}
+    # Widest coverage first, cheapest first within a width. Bucketing by width
+    # leaves each sort a short key and a much smaller list.
+    by_width: dict[int, list[CandidateItem]] = {}
+    for item in items:
+        by_width.setdefault(len(item.coverage), []).append(item)
+    ordered: list[CandidateItem] = []
+    for width in sorted(by_width, reverse=True):
+        ordered.extend(
+            sorted(
+                by_width[width],
+                key=lambda item: (item.price_now, item.price_min30, item.id),
+            )
+        )
 
     for candidate in ordered:
-        coverage = frozenset(candidate.coverage)
+        coverage = item_masks[candidate.id]
         dominated = any(
-            existing_coverage.issuperset(coverage)
-            and existing_price <= candidate.price_now
+            existing_price <= candidate.price_now
+            and existing_coverage | coverage == existing_coverage
             for existing_coverage, existing_price in seen_coverages
         )
         if dominated and candidate.kind == "single" and not candidate.is_synthetic_package:
@@ -14,6 +14,12 @@ if TYPE_CHECKING:
 
 @dataclass(slots=True)
 class ResolvedBiomarker:
+    """A requested biomarker matched to the catalog.
+
+    ``token`` is interned by the resolver, so candidate coverage sets built
+    from it share one string object per token.
+    """
+
     id: int
     token: str
     display_name: str
@@ -47,12 +53,21 @@ class NormalizedBiomarkerInput:
     normalized: str
 
 
+@dataclass(slots=True)
+class CoverageMasks:
+    """Token bit positions and per-item coverage bitmasks for one candidate pool."""
+
+    token_bits: dict[str, int]
+    item_masks: dict[int, int]
+
+
 @dataclass(slots=True)
 class OptimizationContext:
     resolved: list[ResolvedBiomarker]
     unresolved_inputs: list[str]
     candidates: list[CandidateItem]
     token_to_original: dict[str, str]
+    coverage_masks: CoverageMasks | None = None
 
 
 @dataclass(slots=True)
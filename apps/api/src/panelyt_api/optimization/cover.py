@@ -0,0 +1,265 @@
+"""Exact minimum-cost set cover used to price addon swaps.
+
+The search is a depth-first branch-and-bound: every node branches on the
+uncovered token with the fewest covering items, a greedy cover seeds the
+upper bound and nodes are pruned with a fractional per-token price bound.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from typing import cast
+
+from panelyt_api.optimization.context import CandidateItem, CoverageMasks
+
+# Cost reported when the items cannot cover every requested token.
+INFEASIBLE_COST = sys.maxsize
+COVER_CACHE_MAXSIZE = 1000
+
+
+def build_coverage_masks(items: Sequence[CandidateItem]) -> CoverageMasks:
+    """Assign every covered token a bit and encode each item's coverage once."""
+    tokens = sorted({token for item in items for token in item.coverage})
+    token_bits = {token: 1 << idx for idx, token in enumerate(tokens)}
+    item_masks: dict[int, int] = {}
+    for item in items:
+        mask = 0
+        for token in item.coverage:
+            mask |= token_bits[token]
+        item_masks[item.id] = mask
+    return CoverageMasks(token_bits=token_bits, item_masks=item_masks)
+
+
+def minimal_cover_subset(
+    tokens: set[str],
+    items: Sequence[CandidateItem],
+    masks: CoverageMasks | None = None,
+) -> tuple[int, set[int]]:
+    """Return the cheapest subset of ``items`` covering ``tokens``.
+
+    ``masks`` lets callers reuse bitmasks precomputed for the whole candidate
+    pool. Results are memoized on the projected integer masks and prices. The
+    cost is ``INFEASIBLE_COST`` (with an empty selection) when no
+    combination of the items covers every token. Prices are integer grosz and
+    the search never leaves integer arithmetic.
+    """
+    if not tokens:
+        return 0, set()
+
+    target_mask, raw_masks = _project_masks(tokens, items, masks)
+    entries = tuple(
+        (item.id, int(item.price_now), raw_mask & target_mask)
+        for item, raw_mask in zip(items, raw_masks, strict=True)
+        if raw_mask & target_mask
+    )
+    cost, selection = _cached_cover(target_mask, entries)
+    return cost, set(selection)
+
+
+@lru_cache(maxsize=COVER_CACHE_MAXSIZE)
+def _cached_cover(
+    target_mask: int, entries: tuple[tuple[int, int, int], ...]
+) -> tuple[int, frozenset[int]]:
+    """Solve the cover for (id, price, mask) entries projected onto ``target_mask``.
+
+    The result depends on nothing but these integers, so it is safe to share
+    across requests and contexts regardless of how token bits were assigned.
+    """
+    ids = [entry[0] for entry in entries]
+    prices = [entry[1] for entry in entries]
+    item_masks = [entry[2] for entry in entries]
+
+    covering_lists: dict[int, list[int]] = {}
+    for position, mask in enumerate(item_masks):
+        for bit in _iter_bits(mask):
+            covering_lists.setdefault(bit, []).append(position)
+    if any(bit not in covering_lists for bit in _iter_bits(target_mask)):
+        return INFEASIBLE_COST, frozenset()
+    # Per token, the covering items as (price, mask, position) sorted cheapest
+    # first, so the search loop below works on plain tuples.
+    token_items: dict[int, tuple[tuple[int, int, int], ...]] = {
+        bit: tuple(
+            sorted(
+                ((prices[position], item_masks[position], position) for position in covering),
+                key=lambda entry: (entry[0], ids[entry[2]]),
+            )
+        )
+        for bit, covering in covering_lists.items()
+    }
+
+    # Floored shares stay valid lower bounds while keeping the bound integral.
+    static_shares = {
+        bit: min(price // mask.bit_count() for price, mask, _ in covering)
+        for bit, covering in token_items.items()
+    }
+
+    best_cost, best_selection = _greedy_cover(target_mask, item_masks, prices)
+    visited: dict[int, int] = {}
+    chosen: list[int] = []
+
+    def search(uncovered: int, cost: int) -> None:
+        nonlocal best_cost, best_selection
+        if not uncovered:
+            if cost < best_cost:
+                best_cost = cost
+                best_selection = list(chosen)
+            return
+
+        # Reaching the same uncovered set again is only useful if it is cheaper;
+        # setdefault records first visits with a single lookup.
+        visited_count = len(visited)
+        seen_cost = visited.setdefault(uncovered, cost)
+        if len(visited) == visited_count:
+            if seen_cost <= cost:
+                return
+            visited[uncovered] = cost
+
+        # Cheap bound first: shares computed against the full target can only
+        # be smaller than shares against what is still uncovered.
+        bound = 0
+        remaining = uncovered
+        while remaining:
+            lowest = remaining & -remaining
+            remaining ^= lowest
+            bound += static_shares[lowest.bit_length() - 1]
+        if cost + bound >= best_cost:
+            return
+
+        bound = 0
+        branch: tuple[tuple[int, int, int], ...] = ()
+        remaining = uncovered
+        while remaining:
+            lowest = remaining & -remaining
+            remaining ^= lowest
+            covering = token_items[lowest.bit_length() - 1]
+            bound += min(price // (mask & uncovered).bit_count() for price, mask, _ in covering)
+            if not branch or len(covering) < len(branch):
+                branch = covering
+        if cost + bound >= best_cost:
+            return
+
+        for price, mask, position in branch:
+            chosen.append(position)
+            search(uncovered & ~mask, cost + price)
+            chosen.pop()
+
+    search(target_mask, 0)
+    return best_cost, frozenset(ids[position] for position in best_selection)
+
+
+def greedy_cover(tokens: set[str], items: Sequence[CandidateItem]) -> set[int]:
+    """Return the cheapest-per-token greedy cover of the coverable ``tokens``."""
+    target_mask, raw_masks = _project_masks(tokens, items, None)
+    coverable = 0
+    for mask in raw_masks:
+        coverable |= mask
+    prices = [int(item.price_now) for item in items]
+    _, selection = _greedy_cover(target_mask & coverable, raw_masks, prices)
+    return {items[position].id for position in selection}
+
+
+def proven_greedy_cover(
+    tokens: set[str], items: Sequence[CandidateItem]
+) -> set[int] | None:
+    """Return the greedy cover of ``tokens`` when it provably is optimal.
+
+    Each token's cheapest per-token price share is a feasible solution of the
+    LP dual, so their sum bounds every cover from below. The greedy selection
+    is returned only when its cost meets that bound, otherwise ``None``.
+    """
+    if not tokens:
+        return None
+
+    target_mask, raw_masks = _project_masks(tokens, items, None)
+    ids: list[int] = []
+    item_masks: list[int] = []
+    prices: list[int] = []
+    for item, raw_mask in zip(items, raw_masks, strict=True):
+        mask = raw_mask & target_mask
+        if mask == 0:
+            continue
+        ids.append(item.id)
+        item_masks.append(mask)
+        prices.append(int(item.price_now))
+
+    shares: dict[int, float] = {}
+    for mask, price in zip(item_masks, prices, strict=True):
+        share = price / mask.bit_count()
+        for bit in _iter_bits(mask):
+            current = shares.get(bit)
+            if current is None or share < current:
+                shares[bit] = share
+    if len(shares) != target_mask.bit_count():
+        return None
+
+    cost, selection = _greedy_cover(target_mask, item_masks, prices)
+    lower_bound = math.ceil(sum(shares.values()) - 1e-9)
+    if cost > lower_bound:
+        return None
+    return {ids[position] for position in selection}
+
+
+def _project_masks(
+    tokens: set[str],
+    items: Sequence[CandidateItem],
+    masks: CoverageMasks | None,
+) -> tuple[int, list[int]]:
+    if masks is not None and all(token in masks.token_bits for token in tokens):
+        item_masks = [masks.item_masks.get(item.id) for item in items]
+        if all(mask is not None for mask in item_masks):
+            target_mask = 0
+            for token in tokens:
+                target_mask |= masks.token_bits[token]
+            return target_mask, cast(list[int], item_masks)
+
+    token_bits = {token: 1 << idx for idx, token in enumerate(sorted(tokens))}
+    raw_masks: list[int] = []
+    for item in items:
+        mask = 0
+        for token in item.coverage:
+            mask |= token_bits.get(token, 0)
+        raw_masks.append(mask)
+    return (1 << len(token_bits)) - 1, raw_masks
+
+
+def _greedy_cover(
+    target_mask: int, masks: Sequence[int], prices: Sequence[int]
+) -> tuple[int, list[int]]:
+    """Cheapest-per-token greedy cover; assumes every token is coverable."""
+    uncovered = target_mask
+    cost = 0
+    selection: list[int] = []
+    while uncovered:
+        best_position = -1
+        best_ratio = -1.0
+        for position, mask in enumerate(masks):
+            gain = (mask & uncovered).bit_count()
+            if not gain:
+                continue
+            ratio = gain / prices[position] if prices[position] else math.inf
+            if ratio > best_ratio:
+                best_ratio = ratio
+                best_position = position
+        selection.append(best_position)
+        cost += prices[best_position]
+        uncovered &= ~masks[best_position]
+    return cost, selection
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+__all__ = [
+    "INFEASIBLE_COST",
+    "build_coverage_masks",
+    "greedy_cover",
+    "minimal_cover_subset",
+    "proven_greedy_cover",
+]
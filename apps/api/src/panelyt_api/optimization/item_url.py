@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+
 from panelyt_api.core.diag import (
     DIAG_PACKAGE_ITEM_URL_TEMPLATE,
     DIAG_SINGLE_ITEM_URL_TEMPLATE,
@@ -7,13 +9,26 @@ from panelyt_api.core.diag import (
 from panelyt_api.optimization.context import CandidateItem
 
 
-def item_url(item: CandidateItem) -> str:
-    template = (
-        DIAG_PACKAGE_ITEM_URL_TEMPLATE
-        if item.kind == "package"
-        else DIAG_SINGLE_ITEM_URL_TEMPLATE
-    )
+def _format_url(template: str, item: CandidateItem) -> str:
     try:
         return template.format(slug=item.slug, external_id=item.external_id)
     except Exception:  # pragma: no cover - fallback for malformed templates
         return template
+
+
+def _url_builder(template: str) -> Callable[[CandidateItem], str]:
+    """Compile a URL template once; ``prefix{slug}`` templates skip str.format."""
+    prefix = template.removesuffix("{slug}")
+    if prefix != template and "{" not in prefix and "}" not in prefix:
+        return lambda item: f"{prefix}{item.slug}"
+    return lambda item: _format_url(template, item)
+
+
+_package_url = _url_builder(DIAG_PACKAGE_ITEM_URL_TEMPLATE)
+_single_url = _url_builder(DIAG_SINGLE_ITEM_URL_TEMPLATE)
+
+
+def item_url(item: CandidateItem) -> str:
+    if item.kind == "package":
+        return _package_url(item)
+    return _single_url(item)
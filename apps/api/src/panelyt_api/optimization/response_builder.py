@@ -33,11 +33,21 @@ async def build_response_payload(
     deps: ResponseDependencies,
     currency: str,
 ) -> tuple[OptimizeResponse, dict[str, str]]:
-    total_now = round(sum(item.price_now for item in chosen) / 100, 2)
-    total_min30 = round(sum(item.price_min30 for item in chosen) / 100, 2)
-    explain = build_explain_map(chosen)
+    # Totals, ids and the explain map come from one walk over the selection;
+    # prices stay integer grosz until the final conversion.
+    total_now_grosz = 0
+    total_min30_grosz = 0
+    chosen_item_ids: list[int] = []
+    explain: dict[str, list[str]] = {}
+    for item in chosen:
+        total_now_grosz += item.price_now
+        total_min30_grosz += item.price_min30
+        chosen_item_ids.append(item.id)
+        for token in item.coverage:
+            explain.setdefault(token, []).append(item.name)
+    total_now = round(total_now_grosz / 100, 2)
+    total_min30 = round(total_min30_grosz / 100, 2)
 
-    chosen_item_ids = [item.id for item in chosen]
     biomarkers_by_item, labels = await deps.get_all_biomarkers_for_items(chosen_item_ids)
     deps.expand_synthetic_panel_biomarkers(biomarkers_by_item)
     deps.apply_synthetic_coverage_overrides(chosen, biomarkers_by_item)
@@ -57,6 +67,7 @@ async def build_response_payload(
                 continue
             bonus_tokens.setdefault(normalized, token)
 
+    # Must follow the item biomarker fetch; see bonus_price_map.
     bonus_price_map = await deps.bonus_price_map(bonus_tokens, institution_id)
     bonus_total_grosz = sum(bonus_price_map.get(key, 0) for key in bonus_tokens.keys())
     bonus_total_now = round(bonus_total_grosz / 100, 2) if bonus_total_grosz else 0.0
@@ -91,11 +102,3 @@ async def build_response_payload(
         labels=labels,
     )
     return response, labels
-
-
-def build_explain_map(chosen: Sequence[CandidateItem]) -> dict[str, list[str]]:
-    explain: dict[str, list[str]] = {}
-    for item in chosen:
-        for token in item.coverage:
-            explain.setdefault(token, []).append(item.name)
-    return explain
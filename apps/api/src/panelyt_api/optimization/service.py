@@ -1,20 +1,23 @@
 from __future__ import annotations
 
 import logging
-import math
 import time
 from collections.abc import Iterable, Sequence
+from itertools import chain
 
-from cachetools import LRUCache
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from panelyt_api.core import metrics
-from panelyt_api.core.cache import optimization_cache, optimization_context_cache
+from panelyt_api.core.cache import (
+    candidate_cache,
+    optimization_cache,
+    optimization_context_cache,
+)
 from panelyt_api.optimization.addons import AddonDependencies, compute_addon_suggestions
 from panelyt_api.optimization.biomarkers import (
     apply_synthetic_coverage_overrides,
     augment_labels_for_tokens,
-    bonus_price_map,
+    bonus_price_map_cached,
     expand_requested_tokens_raw,
     expand_synthetic_panel_biomarkers,
     get_all_biomarkers_for_items,
@@ -28,6 +31,7 @@ from panelyt_api.optimization.context import (
     ResolvedBiomarker,
     SolverOutcome,
 )
+from panelyt_api.optimization.cover import build_coverage_masks, minimal_cover_subset
 from panelyt_api.optimization.item_url import item_url
 from panelyt_api.optimization.solver_runner import SolverRunner
 from panelyt_api.schemas.optimize import (
@@ -42,7 +46,6 @@ logger = logging.getLogger(__name__)
 
 
 DEFAULT_CURRENCY = "PLN"
-COVER_CACHE_MAXSIZE = 1000
 
 
 class OptimizationService:
@@ -51,9 +54,6 @@ class OptimizationService:
         self._resolver = BiomarkerResolver(session)
         self._candidate_collector = CandidateCollector(session)
         self._solver_runner = SolverRunner(session, empty_response=self._empty_response)
-        self._cover_cache: LRUCache[
-            tuple[frozenset[str], frozenset[int]], tuple[float, frozenset[int]]
-        ] = LRUCache(maxsize=COVER_CACHE_MAXSIZE)
         self._last_context: OptimizationContext | None = None
 
     async def solve(
@@ -95,7 +95,9 @@ class OptimizationService:
                     }
                 )
 
-            return await self._finalize_response(base_response)
+            # Addon suggestions are computed lazily via a separate endpoint and
+            # stay at the schema's empty default here.
+            return base_response
         finally:
             duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
             metrics.increment("optimization.solve", mode="single")
@@ -178,7 +180,9 @@ class OptimizationService:
         existing_labels = token_display_map(context.resolved)
 
         deps = AddonDependencies(
-            minimal_cover_subset=self._minimal_cover_subset,
+            minimal_cover_subset=lambda tokens, items: minimal_cover_subset(
+                tokens, items, context.coverage_masks
+            ),
             expand_requested_tokens_raw=expand_requested_tokens_raw,
             get_all_biomarkers_for_items=lambda item_ids: get_all_biomarkers_for_items(
                 self.session, item_ids
@@ -188,7 +192,7 @@ class OptimizationService:
             augment_labels_for_tokens=lambda tokens, labels: augment_labels_for_tokens(
                 self.session, tokens, labels
             ),
-            bonus_price_map=lambda tokens, target_id: bonus_price_map(
+            bonus_price_map=lambda tokens, target_id: bonus_price_map_cached(
                 self.session, tokens, target_id
             ),
             token_display_map=token_display_map,
@@ -212,7 +216,14 @@ class OptimizationService:
     async def _collect_candidates(
         self, biomarkers: Sequence[ResolvedBiomarker], institution_id: int
     ) -> list[CandidateItem]:
-        return await self._candidate_collector.collect(biomarkers, institution_id)
+        cache_key = candidate_cache.make_key([b.id for b in biomarkers], institution_id)
+        cached = candidate_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        candidates = await self._candidate_collector.collect(biomarkers, institution_id)
+        candidate_cache.set(cache_key, candidates)
+        return candidates
 
     def _prepare_context(
         self,
@@ -220,7 +231,10 @@ class OptimizationService:
         unresolved_inputs: list[str],
         candidates: list[CandidateItem],
     ) -> OptimizationContext | None:
-        pruned = prune_candidates(candidates)
+        # Pruning only drops dominated items, so the pool's token bits stay
+        # valid for the pruned candidates and the masks are built once.
+        masks = build_coverage_masks(candidates)
+        pruned = prune_candidates(candidates, masks)
         if not pruned:
             return None
         token_to_original = {entry.token: entry.original for entry in resolved}
@@ -229,6 +243,7 @@ class OptimizationService:
             unresolved_inputs=list(unresolved_inputs),
             candidates=pruned,
             token_to_original=token_to_original,
+            coverage_masks=masks,
         )
 
     async def _run_solver(
@@ -241,76 +256,18 @@ class OptimizationService:
             candidates, biomarkers, institution_id, currency=DEFAULT_CURRENCY
         )
 
-    async def _finalize_response(
-        self,
-        response: OptimizeResponse,
-    ) -> OptimizeResponse:
-        # Addon suggestions are computed lazily via separate endpoint
-        return response.model_copy(
-            update={
-                "addon_suggestions": [],
-            }
-        )
-
-    def _minimal_cover_subset(
-        self,
-        tokens: set[str],
-        items: Sequence[CandidateItem],
-    ) -> tuple[float, set[int]]:
-        if not tokens:
-            return 0, set()
-
-        cache_key = (frozenset(tokens), frozenset(item.id for item in items))
-        cached = self._cover_cache.get(cache_key)
-        if cached is not None:
-            cost, selection = cached
-            return cost, set(selection)
-
-        ordered_tokens = sorted(tokens)
-        token_index = {token: idx for idx, token in enumerate(ordered_tokens)}
-        target_mask = (1 << len(ordered_tokens)) - 1
-
-        dp: dict[int, tuple[int, frozenset[int]]] = {0: (0, frozenset())}
-
-        for item in items:
-            mask = 0
-            for token in item.coverage:
-                idx = token_index.get(token)
-                if idx is not None:
-                    mask |= 1 << idx
-            if mask == 0:
-                continue
-
-            current_states = list(dp.items())
-            for state_mask, (cost, selection) in current_states:
-                new_mask = state_mask | mask
-                new_cost = cost + int(item.price_now)
-                existing = dp.get(new_mask)
-                if existing is not None and existing[0] <= new_cost:
-                    continue
-                dp[new_mask] = (new_cost, selection | frozenset({item.id}))
-
-        result = dp.get(target_mask)
-        if result is None:
-            self._cover_cache[cache_key] = (math.inf, frozenset())
-            return math.inf, set()
-
-        cost, selection = result
-        self._cover_cache[cache_key] = (float(cost), selection)
-        return int(cost), set(selection)
-
     @staticmethod
     def _combine_uncovered_tokens(
         unresolved_inputs: Sequence[str], uncovered_tokens: Iterable[str]
     ) -> list[str]:
-        return list(dict.fromkeys(list(unresolved_inputs) + sorted(uncovered_tokens)))
+        return list(dict.fromkeys(chain(unresolved_inputs, sorted(uncovered_tokens))))
 
     @staticmethod
     def _fallback_uncovered_tokens(
         resolved: Sequence[ResolvedBiomarker], unresolved_inputs: Sequence[str]
     ) -> list[str]:
-        tokens = [biomarker.token for biomarker in resolved]
-        return list(dict.fromkeys(list(unresolved_inputs) + tokens))
+        tokens = (biomarker.token for biomarker in resolved)
+        return list(dict.fromkeys(chain(unresolved_inputs, tokens)))
 
     @staticmethod
     def _empty_response(uncovered: Sequence[str]) -> OptimizeResponse:
@@ -328,8 +285,5 @@ class OptimizationService:
     def _uncovered_tokens(
         self, biomarkers: Sequence[ResolvedBiomarker], candidates: Sequence[CandidateItem]
     ) -> set[str]:
-        available = set()
-        for item in candidates:
-            available.update(item.coverage)
-        tokens = {b.token for b in biomarkers}
-        return tokens - available
+        available = set(chain.from_iterable(item.coverage for item in candidates))
+        return {b.token for b in biomarkers} - available
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+import os
+from collections.abc import Collection, Mapping, Sequence
 from typing import cast
 
 from ortools.sat.python import cp_model
@@ -9,13 +10,16 @@ from panelyt_api.optimization.context import CandidateItem, ResolvedBiomarker
 
 SOLVER_TIMEOUT_SECONDS = 5.0
 SOLVER_WORKERS = 8
+# Model size (candidates + coverage constraints) thresholds for parameter tiers.
+SMALL_MODEL_SIZE = 64
+LARGE_MODEL_SIZE = 512
 
 
 def build_solver_model(
     candidates: Sequence[CandidateItem],
 ) -> tuple[cp_model.CpModel, dict[int, cp_model.IntVar]]:
     model = cp_model.CpModel()
-    variables = {candidate.id: model.NewBoolVar(candidate.slug) for candidate in candidates}
+    variables = {candidate.id: model.new_bool_var(candidate.slug) for candidate in candidates}
     return model, variables
 
 
@@ -41,7 +45,7 @@ def apply_coverage_constraints(
         if not covering:
             uncovered.append(biomarker.token)
             continue
-        model.Add(sum(variables[item_id] for item_id in covering) >= 1)
+        model.add_bool_or([variables[item_id] for item_id in covering])
     return uncovered
 
 
@@ -50,17 +54,54 @@ def apply_objective(
     candidates: Sequence[CandidateItem],
     variables: Mapping[int, cp_model.IntVar],
 ) -> None:
-    model.Minimize(
-        sum(candidate.price_now * variables[candidate.id] for candidate in candidates)
+    # Plain variable and coefficient lists go to ortools in one call instead of
+    # building an intermediate expression per candidate.
+    model.minimize(
+        cp_model.LinearExpr.weighted_sum(
+            [variables[candidate.id] for candidate in candidates],
+            [candidate.price_now for candidate in candidates],
+        )
     )
 
 
+def apply_solution_hint(
+    model: cp_model.CpModel,
+    variables: Mapping[int, cp_model.IntVar],
+    selected_ids: Collection[int],
+) -> None:
+    """Hint a known feasible selection so the search starts from its cost."""
+    for item_id, variable in variables.items():
+        model.add_hint(variable, item_id in selected_ids)
+
+
+def solver_parameters(candidate_count: int, biomarker_count: int) -> dict[str, int | bool]:
+    """Pick CP-SAT parameters scaled to the model size.
+
+    Small models solve fastest on a single worker without LP relaxation; the
+    parallel portfolio and core-based search only pay off on larger ones.
+    """
+    size = candidate_count + biomarker_count
+    if size <= SMALL_MODEL_SIZE:
+        return {"num_workers": 1, "linearization_level": 0}
+    parameters: dict[str, int | bool] = {
+        "num_workers": min(SOLVER_WORKERS, os.cpu_count() or 1),
+        "cp_model_probing_level": 2,
+    }
+    if size > LARGE_MODEL_SIZE:
+        parameters["optimize_with_core"] = True
+        parameters["core_minimization_level"] = 1
+    return parameters
+
+
 def solve_model(
     model: cp_model.CpModel,
+    parameters: Mapping[str, int | bool] | None = None,
 ) -> tuple[int, cp_model.CpSolver]:
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = SOLVER_TIMEOUT_SECONDS
-    solver.parameters.num_search_workers = SOLVER_WORKERS
+    solver.parameters.num_workers = SOLVER_WORKERS
+    for name, value in (parameters or {}).items():
+        setattr(solver.parameters, name, value)
     status = cast(int, solver.Solve(model))
     return status, solver
 
@@ -73,5 +114,5 @@ def extract_selected_candidates(
     return [
         candidate
         for candidate in candidates
-        if solver.Value(variables[candidate.id])
+        if solver.boolean_value(variables[candidate.id])
     ]
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Mapping, Sequence
 
 from ortools.sat.python import cp_model
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from panelyt_api.optimization.biomarkers import (
     apply_synthetic_coverage_overrides,
     augment_labels_for_tokens,
-    bonus_price_map,
+    bonus_price_map_cached,
     expand_requested_tokens,
     expand_synthetic_panel_biomarkers,
     get_all_biomarkers_for_items,
@@ -19,6 +20,11 @@ from panelyt_api.optimization.context import (
     ResolvedBiomarker,
     SolverOutcome,
 )
+from panelyt_api.optimization.cover import (
+    greedy_cover,
+    minimal_cover_subset,
+    proven_greedy_cover,
+)
 from panelyt_api.optimization.item_url import item_url
 from panelyt_api.optimization.response_builder import (
     ResponseDependencies,
@@ -27,10 +33,12 @@ from panelyt_api.optimization.response_builder import (
 from panelyt_api.optimization.solver import (
     apply_coverage_constraints,
     apply_objective,
+    apply_solution_hint,
     build_coverage_map,
     build_solver_model,
     extract_selected_candidates,
     solve_model,
+    solver_parameters,
 )
 from panelyt_api.schemas.optimize import OptimizeResponse
 
@@ -38,6 +46,10 @@ logger = logging.getLogger(__name__)
 
 EmptyResponseFactory = Callable[[Sequence[str]], OptimizeResponse]
 
+# Panels up to this many coverable tokens are solved by the exact cover
+# search, which finishes well before CP-SAT has even started up.
+EXACT_COVER_MAX_TOKENS = 4
+
 
 class SolverRunner:
     def __init__(
@@ -55,6 +67,21 @@ class SolverRunner:
         currency: str,
     ) -> SolverOutcome:
         coverage_map = build_coverage_map(candidates)
+        shortcut = self._forced_choice(candidates, biomarkers, coverage_map)
+        if shortcut is None:
+            shortcut = self._proven_greedy_choice(candidates, biomarkers, coverage_map)
+        if shortcut is None:
+            shortcut = self._exact_small_choice(candidates, biomarkers, coverage_map)
+        if shortcut is not None:
+            uncovered = [
+                biomarker.token
+                for biomarker in biomarkers
+                if not coverage_map.get(biomarker.token)
+            ]
+            return await self._build_outcome(
+                shortcut, uncovered, biomarkers, institution_id, currency=currency
+            )
+
         model, variables = build_solver_model(candidates)
         uncovered = apply_coverage_constraints(
             model, variables, coverage_map, biomarkers
@@ -71,7 +98,15 @@ class SolverRunner:
             )
 
         apply_objective(model, candidates, variables)
-        status, solver = solve_model(model)
+        covered_tokens = {
+            biomarker.token for biomarker in biomarkers if coverage_map.get(biomarker.token)
+        }
+        apply_solution_hint(model, variables, greedy_cover(covered_tokens, candidates))
+        # CP-SAT releases the GIL while solving; a worker thread keeps the
+        # event loop serving other requests for the length of the solve.
+        status, solver = await asyncio.to_thread(
+            solve_model, model, solver_parameters(len(candidates), len(biomarkers))
+        )
 
         if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
             logger.warning("CP-SAT returned status %s", status)
@@ -86,6 +121,64 @@ class SolverRunner:
             )
 
         chosen = extract_selected_candidates(solver, candidates, variables)
+        return await self._build_outcome(
+            chosen, uncovered, biomarkers, institution_id, currency=currency
+        )
+
+    @staticmethod
+    def _forced_choice(
+        candidates: Sequence[CandidateItem],
+        biomarkers: Sequence[ResolvedBiomarker],
+        coverage_map: Mapping[str, Sequence[int]],
+    ) -> list[CandidateItem] | None:
+        """Return the selection when every token has exactly one covering item."""
+        forced: set[int] = set()
+        for biomarker in biomarkers:
+            covering = coverage_map.get(biomarker.token)
+            if not covering:
+                continue
+            if len(covering) > 1:
+                return None
+            forced.add(covering[0])
+        if not forced:
+            return None
+        return [candidate for candidate in candidates if candidate.id in forced]
+
+    @staticmethod
+    def _proven_greedy_choice(
+        candidates: Sequence[CandidateItem],
+        biomarkers: Sequence[ResolvedBiomarker],
+        coverage_map: Mapping[str, Sequence[int]],
+    ) -> list[CandidateItem] | None:
+        """Skip CP-SAT when a greedy cover already meets the LP lower bound."""
+        tokens = {biomarker.token for biomarker in biomarkers if coverage_map.get(biomarker.token)}
+        selection = proven_greedy_cover(tokens, candidates)
+        if selection is None:
+            return None
+        return [candidate for candidate in candidates if candidate.id in selection]
+
+    @staticmethod
+    def _exact_small_choice(
+        candidates: Sequence[CandidateItem],
+        biomarkers: Sequence[ResolvedBiomarker],
+        coverage_map: Mapping[str, Sequence[int]],
+    ) -> list[CandidateItem] | None:
+        """Solve small panels with the exact cover search instead of CP-SAT."""
+        tokens = {biomarker.token for biomarker in biomarkers if coverage_map.get(biomarker.token)}
+        if not tokens or len(tokens) > EXACT_COVER_MAX_TOKENS:
+            return None
+        _, selection = minimal_cover_subset(tokens, candidates)
+        return [candidate for candidate in candidates if candidate.id in selection]
+
+    async def _build_outcome(
+        self,
+        chosen: Sequence[CandidateItem],
+        uncovered: list[str],
+        biomarkers: Sequence[ResolvedBiomarker],
+        institution_id: int,
+        *,
+        currency: str,
+    ) -> SolverOutcome:
         deps = ResponseDependencies(
             expand_requested_tokens=expand_requested_tokens,
             get_all_biomarkers_for_items=lambda item_ids: get_all_biomarkers_for_items(
@@ -96,7 +189,7 @@ class SolverRunner:
             augment_labels_for_tokens=lambda tokens, labels: augment_labels_for_tokens(
                 self.session, tokens, labels
             ),
-            bonus_price_map=lambda tokens, target_id: bonus_price_map(
+            bonus_price_map=lambda tokens, target_id: bonus_price_map_cached(
                 self.session, tokens, target_id
             ),
             item_url=item_url,
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import json
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+from panelyt_api.utils.normalization import normalize_token, normalize_tokens_iter
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +18,17 @@ class SyntheticPackage:
     slug: str | None
     panel_elab_code: str | None
     component_elab_codes: tuple[str, ...]
+    component_codes: frozenset[str] = field(init=False, repr=False, compare=False)
+    normalized_components: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Derived once at load time; packages are static config.
+        object.__setattr__(self, "component_codes", frozenset(self.component_elab_codes))
+        object.__setattr__(
+            self,
+            "normalized_components",
+            frozenset(normalize_tokens_iter(self.component_elab_codes)),
+        )
 
 
 def _default_config_path() -> Path:
@@ -74,4 +87,28 @@ def load_diag_synthetic_packages() -> list[SyntheticPackage]:
     return parsed
 
 
-__all__ = ["SyntheticPackage", "load_diag_synthetic_packages"]
+@dataclass(frozen=True, slots=True)
+class SyntheticPackageIndex:
+    """Lookups derived from the synthetic package config, built once per load."""
+
+    packages: tuple[SyntheticPackage, ...]
+    panel_components: dict[str, tuple[str, ...]]
+
+
+@lru_cache(maxsize=1)
+def load_synthetic_package_index() -> SyntheticPackageIndex:
+    packages = tuple(load_diag_synthetic_packages())
+    panel_components: dict[str, tuple[str, ...]] = {}
+    for package in packages:
+        normalized_panel = normalize_token(package.panel_elab_code)
+        if normalized_panel and package.component_elab_codes:
+            panel_components[normalized_panel] = package.component_elab_codes
+    return SyntheticPackageIndex(packages=packages, panel_components=panel_components)
+
+
+__all__ = [
+    "SyntheticPackage",
+    "SyntheticPackageIndex",
+    "load_diag_synthetic_packages",
+    "load_synthetic_package_index",
+]
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from collections.abc import Sequence
 from dataclasses import dataclass
+from sys import intern
 from typing import Protocol
 
 from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 from panelyt_api.db import models
 from panelyt_api.optimization.context import ResolvedBiomarker
@@ -86,9 +88,11 @@ class BiomarkerResolver:
                     func.lower(models.BiomarkerAlias.alias).in_(search_tokens),
                 )
             )
+            # Only column attributes are read; fail loudly on any relationship load.
+            .options(raiseload("*"))
         )
-        rows = (await self._session.execute(statement)).all()
-        return [(row[0], row[1]) for row in rows]
+        result = await self._session.execute(statement)
+        return list(result)
 
     def _build_biomarker_token_index(
         self,
@@ -135,7 +139,7 @@ class BiomarkerResolver:
         token = biomarker.elab_code or biomarker.slug or biomarker.name
         return ResolvedBiomarker(
             id=int(biomarker.id),
-            token=token or original,
+            token=intern(token or original),
             display_name=biomarker.name,
             original=original,
         )
@@ -1,11 +1,16 @@
 """Text normalization helpers used across the API."""
 import re
-from collections.abc import Mapping
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
 from typing import Any
 
 
+@lru_cache(maxsize=8192)
 def normalize_token(value: str | None) -> str | None:
-    """Normalize a token to lowercase/stripped form or None if blank."""
+    """Normalize a token to lowercase/stripped form or None if blank.
+
+    Memoized: the same catalog codes, slugs and names recur on every request.
+    """
     if value is None:
         return None
     normalized = value.strip().lower()
@@ -115,16 +120,14 @@ def normalize_username(username: str, pattern: re.Pattern | None = None) -> str:
     return normalized
 
 
+def normalize_tokens_iter(values: Iterable[str | None]) -> list[str]:
+    """Normalize many tokens with normalize_token, dropping blank values."""
+    return [token for token in map(normalize_token, values) if token]
+
+
 def normalize_tokens_set(tokens: list[str] | set[str]) -> set[str]:
     """Normalize tokens into a set of lowercase, non-empty values."""
-    normalized = set()
-    for token in tokens:
-        if not token or not isinstance(token, str):
-            continue
-        norm = normalize_token(token)
-        if norm:
-            normalized.add(norm)
-    return normalized
+    return set(normalize_tokens_iter(token for token in tokens if isinstance(token, str)))
 
 
 def create_normalized_lookup(mapping: Mapping[Any, str]) -> dict[str, Any]:
@@ -143,6 +146,7 @@ __all__ = [
     "normalize_search_query",
     "normalize_slug",
     "normalize_token",
+    "normalize_tokens_iter",
     "normalize_tokens_set",
     "normalize_username",
 ]
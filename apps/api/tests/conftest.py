@@ -18,7 +18,10 @@ from panelyt_api.db.base import Base
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
 
 from panelyt_api.main import create_app
-from panelyt_api.optimization.synthetic_packages import load_diag_synthetic_packages
+from panelyt_api.optimization.synthetic_packages import (
+    load_diag_synthetic_packages,
+    load_synthetic_package_index,
+)
 
 
 @pytest.fixture(scope="session")
@@ -33,10 +36,12 @@ def event_loop() -> Iterator[asyncio.AbstractEventLoop]:
 def clear_caches() -> None:
     clear_all_caches()
     load_diag_synthetic_packages.cache_clear()
+    load_synthetic_package_index.cache_clear()
     get_settings.cache_clear()
     yield
     clear_all_caches()
     load_diag_synthetic_packages.cache_clear()
+    load_synthetic_package_index.cache_clear()
     get_settings.cache_clear()
 
 
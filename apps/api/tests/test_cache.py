@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 from panelyt_api.core.cache import (
+    BonusPriceCache,
+    CandidateCache,
     CatalogMetaCache,
     FreshnessCache,
+    ItemBiomarkerCache,
     OptimizationCache,
+    OptimizationContextCache,
     UserActivityDebouncer,
 )
+from panelyt_api.optimization.context import CandidateItem
 
 
 class TestCatalogMetaCache:
@@ -73,6 +78,19 @@ class TestOptimizationCache:
         key2 = cache.make_key(["AST", "TSH", "ALT"], 1135)
         assert key1 == key2
 
+    def test_make_key_canonicalizes_case_whitespace_and_duplicates(self):
+        cache = OptimizationCache(maxsize=100, ttl_seconds=3600)
+        key1 = cache.make_key(["TSH", "ALT"], 1135)
+        key2 = cache.make_key([" alt ", "tsh", "ALT", ""], 1135)
+        assert key1 == key2
+
+    def test_make_key_shared_with_context_cache(self):
+        cache = OptimizationCache(maxsize=100, ttl_seconds=3600)
+        context_cache = OptimizationContextCache(maxsize=100, ttl_seconds=3600)
+        assert cache.make_key(["TSH", "ALT"], 1135) == context_cache.make_key(
+            ["alt", "tsh", "tsh"], 1135
+        )
+
     def test_clear_removes_all_cached_values(self):
         cache = OptimizationCache(maxsize=100, ttl_seconds=3600)
         cache.set("key1", {"data": 1})
@@ -82,6 +100,95 @@ class TestOptimizationCache:
         assert cache.get("key2") is None
 
 
+class TestCandidateCache:
+    def test_get_returns_none_when_empty(self):
+        cache = CandidateCache(maxsize=100, ttl_seconds=60)
+        assert cache.get(cache.make_key([1, 2], 1135)) is None
+
+    def test_set_and_get_returns_value(self):
+        cache = CandidateCache(maxsize=100, ttl_seconds=60)
+        key = cache.make_key([1, 2], 1135)
+        cache.set(key, ())
+        assert cache.get(key) == []
+
+    def test_get_returns_independent_copies(self):
+        cache = CandidateCache(maxsize=100, ttl_seconds=60)
+        key = cache.make_key([1], 1135)
+        candidate = CandidateItem(
+            id=1,
+            kind="single",
+            name="ALT",
+            slug="alt",
+            external_id="1",
+            price_now=1000,
+            price_min30=1000,
+            sale_price=None,
+            regular_price=None,
+            coverage={"ALT"},
+        )
+        cache.set(key, [candidate])
+        candidate.coverage.add("AST")
+
+        cached = cache.get(key)
+        assert cached is not None
+        cached[0].coverage.add("GGT")
+        cached[0].price_now = 1
+
+        again = cache.get(key)
+        assert again is not None
+        assert again[0].coverage == {"ALT"}
+        assert again[0].price_now == 1000
+
+    def test_make_key_order_independent_and_per_institution(self):
+        cache = CandidateCache(maxsize=100, ttl_seconds=60)
+        assert cache.make_key([1, 2], 1135) == cache.make_key([2, 1], 1135)
+        assert cache.make_key([1, 2], 1135) != cache.make_key([1, 2], 2222)
+
+    def test_clear_removes_all_cached_values(self):
+        cache = CandidateCache(maxsize=100, ttl_seconds=60)
+        key = cache.make_key([1], 1135)
+        cache.set(key, ())
+        cache.clear()
+        assert cache.get(key) is None
+
+
+class TestBonusPriceCache:
+    def test_get_returns_none_when_empty(self):
+        cache = BonusPriceCache(maxsize=100, ttl_seconds=300)
+        assert cache.get(cache.make_key({"alt": "ALT"}, 1135)) is None
+
+    def test_set_and_get_returns_copy(self):
+        cache = BonusPriceCache(maxsize=100, ttl_seconds=300)
+        key = cache.make_key({"alt": "ALT"}, 1135)
+        cache.set(key, {"alt": 900})
+        cached = cache.get(key)
+        assert cached == {"alt": 900}
+        cached["alt"] = 1
+        assert cache.get(key) == {"alt": 900}
+
+    def test_make_key_depends_on_tokens_and_institution(self):
+        cache = BonusPriceCache(maxsize=100, ttl_seconds=300)
+        key = cache.make_key({"alt": "ALT", "ast": "AST"}, 1135)
+        assert key == cache.make_key({"ast": "AST", "alt": "ALT"}, 1135)
+        assert key != cache.make_key({"alt": "ALT", "ast": "AST"}, 2222)
+        assert key != cache.make_key({"alt": "alt", "ast": "AST"}, 1135)
+
+
+class TestItemBiomarkerCache:
+    def test_get_many_reports_missing_ids(self):
+        cache = ItemBiomarkerCache(maxsize=100, ttl_seconds=600)
+        cache.set_many({1: (("ALT", "Alanine"),), 2: ()})
+        found, missing = cache.get_many([1, 2, 3])
+        assert found == {1: (("ALT", "Alanine"),), 2: ()}
+        assert missing == [3]
+
+    def test_clear_removes_all_cached_values(self):
+        cache = ItemBiomarkerCache(maxsize=100, ttl_seconds=600)
+        cache.set_many({1: (("ALT", None),)})
+        cache.clear()
+        assert cache.get_many([1]) == ({}, [1])
+
+
 class TestFreshnessCache:
     def test_should_check_returns_true_when_never_checked(self):
         cache = FreshnessCache(ttl_seconds=300)
@@ -16,6 +16,7 @@ catalog_meta_cache.set(
     )
 )
 synthetic_packages.load_diag_synthetic_packages()
+synthetic_packages.load_synthetic_package_index()
 
 
 def test_autouse_cache_clear_removes_catalog_meta() -> None:
@@ -24,3 +25,7 @@ def test_autouse_cache_clear_removes_catalog_meta() -> None:
 
 def test_autouse_cache_clear_resets_synthetic_packages_cache() -> None:
     assert synthetic_packages.load_diag_synthetic_packages.cache_info().currsize == 0
+
+
+def test_autouse_cache_clear_resets_synthetic_package_index() -> None:
+    assert synthetic_packages.load_synthetic_package_index.cache_info().currsize == 0
@@ -414,6 +414,50 @@ async def test_prune_missing_offers_noops_on_empty_list(db_session) -> None:
     assert institution_item.is_available is True
 
 
+@pytest.mark.asyncio
+async def test_upsert_catalog_keeps_truncated_biomarker_names_trimmed(
+    db_session,
+) -> None:
+    repo = CatalogRepository(db_session)
+    await db_session.execute(
+        models.Institution.__table__.insert().values(
+            make_institution(id=1135, name="Default / Lab office")
+        )
+    )
+    # The 255-character cut lands right after a space.
+    long_name = "a" * 254 + " " + "b" * 10
+    item = RawDiagItem(
+        external_id="diag-long",
+        kind="single",
+        name="Long",
+        slug="long",
+        price_now_grosz=1000,
+        price_min30_grosz=900,
+        currency="PLN",
+        is_available=True,
+        biomarkers=[
+            RawDiagBiomarker(
+                external_id="long-1",
+                name=long_name,
+                elab_code="LONG1",
+                slug="long-1",
+            )
+        ],
+        sale_price_grosz=None,
+        regular_price_grosz=1000,
+    )
+
+    await repo.upsert_catalog(
+        1135, singles=[item], packages=[], fetched_at=datetime(2025, 1, 1, tzinfo=UTC)
+    )
+    await db_session.commit()
+
+    stored_name = await db_session.scalar(
+        select(models.Biomarker.name).where(models.Biomarker.elab_code == "LONG1")
+    )
+    assert stored_name == "a" * 254
+
+
 def test_resolve_diag_item_slug_prefers_raw_slug_and_truncates() -> None:
     raw_slug = "a" * 256
     item = RawDiagItem(
@@ -1,5 +1,6 @@
 from panelyt_api.optimization.candidates import prune_candidates
-from panelyt_api.optimization.item_url import item_url
+from panelyt_api.optimization.cover import build_coverage_masks
+from panelyt_api.optimization.item_url import _url_builder, item_url
 from panelyt_api.optimization.service import CandidateItem
 
 
@@ -47,6 +48,10 @@ def test_prune_cheapest_single_only():
     ids = {item.id for item in pruned}
     assert ids == {1, 2, 3}
 
+    # Masks built for the whole pool give the same result.
+    masks = build_coverage_masks(candidates)
+    assert prune_candidates(candidates, masks) == pruned
+
 
 def test_item_url_builds_correct_path():
     candidate = CandidateItem(
@@ -65,3 +70,21 @@ def test_item_url_builds_correct_path():
 
     candidate.kind = "single"
     assert item_url(candidate) == "https://diag.pl/sklep/badania/wellness"
+
+
+def test_item_url_builder_formats_templates_with_other_placeholders():
+    candidate = CandidateItem(
+        id=11,
+        kind="single",
+        name="ALT",
+        slug="alt",
+        external_id="item-11",
+        price_now=1000,
+        price_min30=1000,
+        sale_price=None,
+        regular_price=None,
+        coverage={"ALT"},
+    )
+    build = _url_builder("https://example.test/{external_id}/{slug}")
+
+    assert build(candidate) == "https://example.test/item-11/alt"
@@ -2,8 +2,13 @@ from __future__ import annotations
 
 import pytest
 
-from panelyt_api.optimization.addons import AddonDependencies, compute_addon_suggestions
+from panelyt_api.optimization.addons import (
+    ADDON_CANDIDATE_POOL_SIZE,
+    AddonDependencies,
+    compute_addon_suggestions,
+)
 from panelyt_api.optimization.context import CandidateItem, OptimizationContext, ResolvedBiomarker
+from panelyt_api.optimization.cover import minimal_cover_subset
 
 
 def _forbid_sync(*_args, **_kwargs):
@@ -60,3 +65,77 @@ async def test_addon_suggestions_short_circuits_when_insufficient_inputs():
 
     assert suggestions == []
     assert labels == {}
+
+
+def _candidate(item_id: int, kind: str, price: int, coverage: set[str]) -> CandidateItem:
+    return CandidateItem(
+        id=item_id,
+        kind=kind,
+        name=f"Item {item_id}",
+        slug=f"item-{item_id}",
+        external_id=f"item-{item_id}",
+        price_now=price,
+        price_min30=price,
+        sale_price=None,
+        regular_price=None,
+        coverage=coverage,
+    )
+
+
+@pytest.mark.asyncio
+async def test_addon_suggestions_skip_cover_search_for_candidates_outside_pool():
+    chosen_items = [
+        _candidate(1, "single", 100, {"A"}),
+        _candidate(2, "single", 100, {"B"}),
+    ]
+    packages = [
+        _candidate(100 + offset, "package", 150 + offset, {"A", "B"})
+        for offset in range(ADDON_CANDIDATE_POOL_SIZE)
+    ]
+    expensive = _candidate(999, "package", 10_000, {"A", "B"})
+    context = OptimizationContext(
+        resolved=[
+            ResolvedBiomarker(id=1, token="A", display_name="A", original="A"),
+            ResolvedBiomarker(id=2, token="B", display_name="B", original="B"),
+        ],
+        unresolved_inputs=[],
+        candidates=[*chosen_items, *packages, expensive],
+        token_to_original={},
+    )
+    cover_calls: list[set[str]] = []
+
+    def counting_cover(tokens, items):
+        cover_calls.append(set(tokens))
+        return minimal_cover_subset(tokens, items)
+
+    async def no_biomarkers(_item_ids):
+        return {}, {}
+
+    async def no_labels(_tokens, _labels):
+        return None
+
+    async def no_prices(_tokens, _institution_id):
+        return {}
+
+    deps = AddonDependencies(
+        minimal_cover_subset=counting_cover,
+        expand_requested_tokens_raw=set,
+        get_all_biomarkers_for_items=no_biomarkers,
+        expand_synthetic_panel_biomarkers=lambda _map: None,
+        apply_synthetic_coverage_overrides=lambda _items, _map: None,
+        augment_labels_for_tokens=no_labels,
+        bonus_price_map=no_prices,
+        token_display_map=lambda _resolved: {},
+        item_url=lambda _item: "",
+    )
+
+    await compute_addon_suggestions(
+        context,
+        chosen_items,
+        existing_labels={},
+        institution_id=1,
+        deps=deps,
+        currency="PLN",
+    )
+
+    assert len(cover_calls) == len(packages)
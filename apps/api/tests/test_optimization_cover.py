@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import random
+from itertools import combinations
+
+from panelyt_api.optimization import cover
+from panelyt_api.optimization.context import CandidateItem
+from panelyt_api.optimization.cover import (
+    INFEASIBLE_COST,
+    build_coverage_masks,
+    greedy_cover,
+    minimal_cover_subset,
+    proven_greedy_cover,
+)
+
+
+def make_candidate(**overrides) -> CandidateItem:
+    defaults = {
+        "id": 1,
+        "kind": "single",
+        "name": "Test",
+        "slug": "test",
+        "external_id": "item-1",
+        "price_now": 1000,
+        "price_min30": 1000,
+        "sale_price": None,
+        "regular_price": None,
+        "coverage": set(),
+    }
+    defaults.update(overrides)
+    defaults["coverage"] = set(defaults["coverage"])
+    return CandidateItem(**defaults)
+
+
+def _brute_force_cost(tokens: set[str], items: list[CandidateItem]) -> int:
+    best = INFEASIBLE_COST
+    for size in range(len(items) + 1):
+        for subset in combinations(items, size):
+            covered = set().union(*(item.coverage for item in subset)) if subset else set()
+            if tokens <= covered:
+                best = min(best, sum(item.price_now for item in subset))
+    return best
+
+
+def test_minimal_cover_subset_empty_tokens():
+    assert minimal_cover_subset(set(), []) == (0, set())
+
+
+def test_minimal_cover_subset_prefers_cheaper_combination():
+    items = [
+        make_candidate(id=1, price_now=1000, coverage={"A", "B", "C"}),
+        make_candidate(id=2, price_now=300, coverage={"A", "B"}),
+        make_candidate(id=3, price_now=400, coverage={"C"}),
+        make_candidate(id=4, price_now=900, coverage={"B", "C"}),
+    ]
+
+    cost, selection = minimal_cover_subset({"A", "B", "C"}, items)
+
+    assert cost == 700
+    assert selection == {2, 3}
+
+
+def test_minimal_cover_subset_reports_uncoverable_tokens():
+    items = [make_candidate(id=1, price_now=100, coverage={"A"})]
+
+    cost, selection = minimal_cover_subset({"A", "B"}, items)
+
+    assert cost == INFEASIBLE_COST
+    assert isinstance(cost, int)
+    assert selection == set()
+
+
+def test_minimal_cover_subset_matches_brute_force():
+    rng = random.Random(1234)
+    universe = [f"T{idx}" for idx in range(7)]
+    for _ in range(50):
+        items = [
+            make_candidate(
+                id=item_id,
+                price_now=rng.randint(1, 50) * 100,
+                coverage=set(rng.sample(universe, rng.randint(1, 4))),
+            )
+            for item_id in range(1, rng.randint(2, 10))
+        ]
+        tokens = set(rng.sample(universe, rng.randint(1, len(universe))))
+
+        cost, selection = minimal_cover_subset(tokens, items)
+
+        expected = _brute_force_cost(tokens, items)
+        assert cost == expected
+        if expected == INFEASIBLE_COST:
+            continue
+        chosen = [item for item in items if item.id in selection]
+        assert sum(item.price_now for item in chosen) == cost
+        assert tokens <= set().union(*(item.coverage for item in chosen))
+
+
+def test_minimal_cover_subset_reuses_precomputed_masks():
+    items = [
+        make_candidate(id=1, price_now=500, coverage={"A", "B"}),
+        make_candidate(id=2, price_now=200, coverage={"B", "C"}),
+        make_candidate(id=3, price_now=250, coverage={"A"}),
+        make_candidate(id=4, price_now=900, coverage={"D"}),
+    ]
+    masks = build_coverage_masks(items)
+
+    assert set(masks.token_bits) == {"A", "B", "C", "D"}
+    assert masks.item_masks[1] == masks.token_bits["A"] | masks.token_bits["B"]
+
+    for tokens in ({"A", "C"}, {"B"}, {"A", "B", "C", "D"}, {"A", "E"}):
+        assert minimal_cover_subset(tokens, items, masks) == minimal_cover_subset(
+            tokens, items
+        )
+
+
+def test_minimal_cover_subset_memoizes_projected_entries():
+    items = [
+        make_candidate(id=1, price_now=500, coverage={"A", "B"}),
+        make_candidate(id=2, price_now=200, coverage={"B", "C"}),
+        make_candidate(id=3, price_now=250, coverage={"A"}),
+    ]
+    cover._cached_cover.cache_clear()
+
+    first = minimal_cover_subset({"A", "B"}, items)
+    # A reordered token set projects onto the same integer entries.
+    second = minimal_cover_subset({"B", "A"}, items)
+
+    assert first == second == (450, {2, 3})
+    assert cover._cached_cover.cache_info().hits == 1
+
+
+def test_proven_greedy_cover_returns_selection_meeting_bound():
+    items = [
+        make_candidate(id=1, price_now=1000, coverage={"A"}),
+        make_candidate(id=2, price_now=1500, coverage={"A", "B"}),
+        make_candidate(id=3, price_now=900, coverage={"B"}),
+    ]
+
+    assert proven_greedy_cover({"A", "B"}, items) == {2}
+
+
+def test_proven_greedy_cover_rejects_unproven_selection():
+    # Greedy takes the 3-token package first and then needs a fourth item;
+    # the optimum is the two 2-token packages, so greedy cannot be proven.
+    items = [
+        make_candidate(id=1, price_now=300, coverage={"A", "B", "C"}),
+        make_candidate(id=2, price_now=250, coverage={"A", "B"}),
+        make_candidate(id=3, price_now=250, coverage={"C", "D"}),
+        make_candidate(id=4, price_now=300, coverage={"D"}),
+    ]
+
+    assert proven_greedy_cover({"A", "B", "C", "D"}, items) is None
+    assert proven_greedy_cover({"A", "E"}, items) is None
+
+
+def test_greedy_cover_skips_uncoverable_tokens():
+    items = [
+        make_candidate(id=1, price_now=300, coverage={"A", "B", "C"}),
+        make_candidate(id=2, price_now=250, coverage={"A", "B"}),
+        make_candidate(id=3, price_now=250, coverage={"C", "D"}),
+        make_candidate(id=4, price_now=300, coverage={"D"}),
+    ]
+
+    assert greedy_cover({"A", "B", "C", "D", "E"}, items) == {1, 3}
@@ -13,10 +13,14 @@ from panelyt_api.optimization.biomarkers import (
     apply_synthetic_coverage_overrides,
     augment_labels_for_tokens,
     bonus_price_map,
+    bonus_price_map_cached,
+    bonus_price_maps,
     expand_requested_tokens,
     expand_synthetic_panel_biomarkers,
     get_all_biomarkers_for_items,
 )
+from panelyt_api.optimization import biomarkers as biomarkers_module
+from panelyt_api.optimization import solver_runner
 from panelyt_api.optimization.item_url import item_url
 from panelyt_api.optimization.response_builder import (
     ResponseDependencies,
@@ -107,7 +111,7 @@ async def build_response(
         augment_labels_for_tokens=lambda tokens, labels: augment_labels_for_tokens(
             service.session, tokens, labels
         ),
-        bonus_price_map=lambda tokens, target_id: bonus_price_map(
+        bonus_price_map=lambda tokens, target_id: bonus_price_map_cached(
             service.session, tokens, target_id
         ),
         item_url=item_url,
@@ -195,13 +199,20 @@ class TestOptimizationService:
 
         call_count = 0
         original_execute = service.session.execute
+        original_stream = service.session.stream
 
         async def counting_execute(*args, **kwargs):
             nonlocal call_count
             call_count += 1
             return await original_execute(*args, **kwargs)
 
+        async def counting_stream(*args, **kwargs):
+            nonlocal call_count
+            call_count += 1
+            return await original_stream(*args, **kwargs)
+
         monkeypatch.setattr(service.session, "execute", counting_execute)
+        monkeypatch.setattr(service.session, "stream", counting_stream)
 
         resolved, unresolved = await service._resolver.resolve_tokens(["ALT", "AST", "alt"])
 
@@ -445,6 +456,114 @@ class TestOptimizationService:
         assert package.kind == "package"
         assert package.coverage == {"20", "21", "22", "23", "26"}
 
+    @pytest.mark.asyncio
+    async def test_collect_candidates_uses_single_query(
+        self, service, db_session, monkeypatch
+    ):
+        """Panel aliases and synthetic packages are fetched in one round-trip."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+
+        await insert_institution(db_session)
+
+        await db_session.execute(
+            insert(models.Biomarker).values(
+                [
+                    {"id": 1, "name": "ALT", "elab_code": "20", "slug": "alt"},
+                    {"id": 2, "name": "AST", "elab_code": "21", "slug": "ast"},
+                    {
+                        "id": 4,
+                        "name": "Liver panel",
+                        "elab_code": "19",
+                        "slug": "proby-watrobowe",
+                    },
+                ]
+            )
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": 10,
+                    "external_id": "605348830",
+                    "kind": "single",
+                    "name": "Proby watrobowe (ALT, AST, ALP, BIL, GGTP)",
+                    "slug": "proby-watrobowe-alt-ast-alp-bil-ggtp",
+                    "price_now_grosz": 6555,
+                    "price_min30_grosz": 2375,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+                {
+                    "id": 11,
+                    "external_id": "605377233",
+                    "kind": "package",
+                    "name": "Badania na wątrobę i trzustkę",
+                    "slug": "badania-na-watrobe-i-trzustke",
+                    "price_now_grosz": 8900,
+                    "price_min30_grosz": 8900,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+                {
+                    "id": 12,
+                    "external_id": "item-12",
+                    "kind": "single",
+                    "name": "ALT",
+                    "slug": "alt",
+                    "price_now_grosz": 1000,
+                    "price_min30_grosz": 1000,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values(
+                [
+                    {"item_id": 11, "biomarker_id": 4},
+                    {"item_id": 12, "biomarker_id": 1},
+                ]
+            )
+        )
+        await db_session.commit()
+
+        call_count = 0
+        original_execute = service.session.execute
+        original_stream = service.session.stream
+
+        async def counting_execute(*args, **kwargs):
+            nonlocal call_count
+            call_count += 1
+            return await original_execute(*args, **kwargs)
+
+        async def counting_stream(*args, **kwargs):
+            nonlocal call_count
+            call_count += 1
+            return await original_stream(*args, **kwargs)
+
+        monkeypatch.setattr(service.session, "execute", counting_execute)
+        monkeypatch.setattr(service.session, "stream", counting_stream)
+
+        biomarkers = [
+            ResolvedBiomarker(id=1, token="20", display_name="ALT", original="ALT"),
+            ResolvedBiomarker(id=2, token="21", display_name="AST", original="AST"),
+        ]
+
+        candidates = await service._collect_candidates(biomarkers, DEFAULT_INSTITUTION_ID)
+
+        assert call_count == 1
+        by_id = {candidate.id: candidate for candidate in candidates}
+        assert set(by_id) == {10, 11, 12}
+        assert by_id[10].is_synthetic_package is True
+        assert by_id[10].coverage == {"20", "21", "22", "23", "26"}
+        assert by_id[11].coverage == {"20", "21", "22", "23", "26"}
+        assert by_id[12].coverage == {"20"}
+
     @pytest.mark.asyncio
     async def test_build_response_uses_synthetic_coverage(self, service, db_session):
         """Synthetic packages should return component biomarkers in responses."""
@@ -1805,6 +1924,13 @@ class TestOptimizationService:
         )
         await db_session.commit()
 
+        monkeypatch.setattr(
+            solver_runner.SolverRunner,
+            "_forced_choice",
+            staticmethod(lambda *_args: None),
+        )
+        monkeypatch.setattr(solver_runner, "proven_greedy_cover", lambda *_args: None)
+        monkeypatch.setattr(solver_runner, "EXACT_COVER_MAX_TOKENS", 0)
         monkeypatch.setattr(
             cp_model.CpSolver,
             "Solve",
@@ -1821,6 +1947,209 @@ class TestOptimizationService:
         assert result.total_now == 0.0
         assert result.explain == {}
 
+    @pytest.mark.asyncio
+    async def test_solve_skips_cp_sat_when_greedy_cover_is_optimal(
+        self, service, db_session, monkeypatch
+    ):
+        """A greedy cover meeting the LP bound is returned without CP-SAT."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+        await insert_institution(db_session)
+        await db_session.execute(
+            insert(models.Biomarker).values([
+                {"id": 1, "name": "ALT", "elab_code": "ALT", "slug": "alt"},
+                {"id": 2, "name": "AST", "elab_code": "AST", "slug": "ast"},
+            ])
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": 1,
+                    "external_id": "1",
+                    "kind": "single",
+                    "name": "ALT Test",
+                    "slug": "alt-test",
+                    "price_now_grosz": 1000,
+                    "price_min30_grosz": 1000,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+                {
+                    "id": 2,
+                    "external_id": "2",
+                    "kind": "package",
+                    "name": "Liver panel",
+                    "slug": "liver-panel",
+                    "price_now_grosz": 1500,
+                    "price_min30_grosz": 1500,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values([
+                {"item_id": 1, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 2},
+            ])
+        )
+        await db_session.commit()
+
+        def fail_solve(*_args, **_kwargs):
+            raise AssertionError("CP-SAT should not run")
+
+        monkeypatch.setattr(cp_model.CpSolver, "Solve", fail_solve)
+
+        result = await service.solve(
+            OptimizeRequest(biomarkers=["ALT", "AST"]),
+            DEFAULT_INSTITUTION_ID,
+        )
+
+        assert [item.id for item in result.items] == [2]
+        assert result.total_now == 15.0
+        assert result.uncovered == []
+
+    @pytest.mark.asyncio
+    async def test_solve_uses_exact_cover_for_small_panels(
+        self, service, db_session, monkeypatch
+    ):
+        """Small panels the greedy bound cannot prove are solved without CP-SAT."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+        await insert_institution(db_session)
+        await db_session.execute(
+            insert(models.Biomarker).values([
+                {"id": 1, "name": "ALT", "elab_code": "ALT", "slug": "alt"},
+                {"id": 2, "name": "AST", "elab_code": "AST", "slug": "ast"},
+                {"id": 3, "name": "CRP", "elab_code": "CRP", "slug": "crp"},
+            ])
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": item_id,
+                    "external_id": str(item_id),
+                    "kind": kind,
+                    "name": f"Item {item_id}",
+                    "slug": f"item-{item_id}",
+                    "price_now_grosz": price,
+                    "price_min30_grosz": price,
+                    "currency": "PLN",
+                    "is_available": True,
+                }
+                for item_id, kind, price in (
+                    (1, "package", 600),
+                    (2, "package", 600),
+                    (3, "single", 350),
+                    (4, "single", 350),
+                )
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values([
+                {"item_id": 1, "biomarker_id": 1},
+                {"item_id": 1, "biomarker_id": 2},
+                {"item_id": 2, "biomarker_id": 2},
+                {"item_id": 2, "biomarker_id": 3},
+                {"item_id": 3, "biomarker_id": 1},
+                {"item_id": 4, "biomarker_id": 3},
+            ])
+        )
+        await db_session.commit()
+
+        def fail_solve(*_args, **_kwargs):
+            raise AssertionError("CP-SAT should not run")
+
+        monkeypatch.setattr(cp_model.CpSolver, "Solve", fail_solve)
+
+        result = await service.solve(
+            OptimizeRequest(biomarkers=["ALT", "AST", "CRP"]),
+            DEFAULT_INSTITUTION_ID,
+        )
+
+        assert result.total_now == 9.5
+        assert len(result.items) == 2
+        assert result.uncovered == []
+
+    @pytest.mark.asyncio
+    async def test_solve_skips_cp_sat_when_selection_is_forced(
+        self, service, db_session, monkeypatch
+    ):
+        """Tokens with a single covering item are answered without CP-SAT."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+        await insert_institution(db_session)
+        await db_session.execute(
+            insert(models.Biomarker).values([
+                {"id": 1, "name": "ALT", "elab_code": "ALT", "slug": "alt"},
+                {"id": 2, "name": "AST", "elab_code": "AST", "slug": "ast"},
+            ])
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": 1,
+                    "external_id": "1",
+                    "kind": "single",
+                    "name": "ALT Test",
+                    "slug": "alt-test",
+                    "price_now_grosz": 1000,
+                    "price_min30_grosz": 1000,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+                {
+                    "id": 2,
+                    "external_id": "2",
+                    "kind": "single",
+                    "name": "AST Test",
+                    "slug": "ast-test",
+                    "price_now_grosz": 1200,
+                    "price_min30_grosz": 1200,
+                    "currency": "PLN",
+                    "is_available": True,
+                },
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values([
+                {"item_id": 1, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 2},
+            ])
+        )
+        await db_session.commit()
+
+        def fail_solve(*_args, **_kwargs):
+            raise AssertionError("CP-SAT should not run")
+
+        monkeypatch.setattr(solver_runner, "proven_greedy_cover", lambda *_args: None)
+        monkeypatch.setattr(cp_model.CpSolver, "Solve", fail_solve)
+
+        result = await service.solve(
+            OptimizeRequest(biomarkers=["ALT", "AST"]),
+            DEFAULT_INSTITUTION_ID,
+        )
+
+        assert sorted(item.id for item in result.items) == [1, 2]
+        assert result.total_now == 22.0
+        assert result.uncovered == []
+
     @pytest.mark.asyncio
     async def test_solve_ignores_unavailable_items(self, service, db_session):
         """Items flagged as unavailable must not be considered by the solver."""
@@ -2345,6 +2674,152 @@ class TestOptimizationService:
 
         assert addon_result.addon_suggestions == []
 
+    @pytest.mark.asyncio
+    async def test_bonus_price_map_matches_any_token_column(self, db_session):
+        """Bonus prices resolve tokens given as elab code, slug or exact name."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+        await insert_institution(db_session)
+        await db_session.execute(
+            insert(models.Biomarker).values([
+                {"id": 1, "name": "Alanine", "elab_code": "ALT", "slug": "alt"},
+                {"id": 2, "name": "Aspartate", "elab_code": "AST", "slug": "ast"},
+                {"id": 3, "name": "Bilirubin", "elab_code": "BIL", "slug": "bilirubin"},
+            ])
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": item_id,
+                    "external_id": str(item_id),
+                    "kind": "single",
+                    "name": f"Single {item_id}",
+                    "slug": f"single-{item_id}",
+                    "price_now_grosz": price,
+                    "price_min30_grosz": price,
+                    "currency": "PLN",
+                    "is_available": True,
+                }
+                for item_id, price in ((1, 1200), (2, 900), (3, 800), (4, 700))
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values([
+                {"item_id": 1, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 1},
+                {"item_id": 3, "biomarker_id": 2},
+                {"item_id": 4, "biomarker_id": 3},
+            ])
+        )
+        await db_session.commit()
+
+        prices = await bonus_price_map(
+            db_session,
+            {"alt": "ALT", "aspartate": "Aspartate", "bilirubin": "bilirubin"},
+            DEFAULT_INSTITUTION_ID,
+        )
+
+        assert prices == {"alt": 900, "aspartate": 800, "bilirubin": 700}
+
+        await insert_institution(db_session, 2222)
+        await db_session.execute(
+            insert(models.InstitutionItem).values(
+                _offer_from_item(
+                    {"id": 1, "price_now_grosz": 500}, 2222, datetime.now(UTC)
+                )
+            )
+        )
+        await db_session.commit()
+        by_institution = await bonus_price_maps(
+            db_session,
+            {"alt": "ALT", "aspartate": "Aspartate"},
+            [DEFAULT_INSTITUTION_ID, 2222, 3333],
+        )
+        assert by_institution == {
+            DEFAULT_INSTITUTION_ID: {"alt": 900, "aspartate": 800},
+            2222: {"alt": 500},
+        }
+
+        # Cached per institution and tokens: a second call skips the database.
+        first = await bonus_price_map_cached(db_session, {"alt": "ALT"}, DEFAULT_INSTITUTION_ID)
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.commit()
+        second = await bonus_price_map_cached(db_session, {"alt": "ALT"}, DEFAULT_INSTITUTION_ID)
+        assert first == second == {"alt": 900}
+
+    @pytest.mark.asyncio
+    async def test_get_all_biomarkers_for_items_merges_id_batches(
+        self, db_session, monkeypatch
+    ):
+        """Item ids split across IN-list batches still yield one merged map."""
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.execute(delete(models.Item))
+        await db_session.execute(delete(models.InstitutionItem))
+        await db_session.execute(delete(models.Institution))
+        await db_session.execute(delete(models.Biomarker))
+        await db_session.commit()
+        await insert_institution(db_session)
+        await db_session.execute(
+            insert(models.Biomarker).values([
+                {"id": 1, "name": "Alanine", "elab_code": "ALT", "slug": "alt"},
+                # trim() only removes spaces, so this passes the name check.
+                {"id": 2, "name": "\tAspartate\n", "elab_code": None, "slug": "ast"},
+            ])
+        )
+        await insert_items_with_offers(
+            db_session,
+            [
+                {
+                    "id": item_id,
+                    "external_id": str(item_id),
+                    "kind": "single",
+                    "name": f"Item {item_id}",
+                    "slug": f"item-{item_id}",
+                    "price_now_grosz": 1000,
+                    "price_min30_grosz": 1000,
+                    "currency": "PLN",
+                    "is_available": True,
+                }
+                for item_id in (1, 2, 3)
+            ],
+        )
+        await db_session.execute(
+            insert(models.ItemBiomarker).values([
+                {"item_id": 1, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 1},
+                {"item_id": 2, "biomarker_id": 2},
+                {"item_id": 3, "biomarker_id": 2},
+            ])
+        )
+        await db_session.commit()
+        monkeypatch.setattr(biomarkers_module, "ITEM_ID_BATCH_SIZE", 2)
+
+        by_item, labels = await get_all_biomarkers_for_items(db_session, [1, 2, 3, 4])
+
+        # Tokens arrive ordered per item.
+        assert by_item == {
+            1: ["ALT"],
+            2: ["ALT", "ast"],
+            3: ["ast"],
+            4: [],
+        }
+        assert labels == {"ALT": "Alanine", "ast": "Aspartate"}
+
+        # Per-item results are cached: already loaded items skip the database.
+        await db_session.execute(delete(models.ItemBiomarker))
+        await db_session.commit()
+        cached_by_item, cached_labels = await get_all_biomarkers_for_items(db_session, [2, 4])
+        assert {item_id: sorted(tokens) for item_id, tokens in cached_by_item.items()} == {
+            2: ["ALT", "ast"],
+            4: [],
+        }
+        assert cached_labels == {"ALT": "Alanine", "ast": "Aspartate"}
+
 
 class TestOptimizationCaching:
     @pytest.mark.asyncio
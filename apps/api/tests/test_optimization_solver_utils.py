@@ -6,10 +6,12 @@ from panelyt_api.optimization.context import CandidateItem, ResolvedBiomarker
 from panelyt_api.optimization.solver import (
     apply_coverage_constraints,
     apply_objective,
+    apply_solution_hint,
     build_coverage_map,
     build_solver_model,
     extract_selected_candidates,
     solve_model,
+    solver_parameters,
 )
 
 
@@ -105,3 +107,36 @@ def test_apply_coverage_constraints_reports_uncovered_tokens():
     uncovered = apply_coverage_constraints(model, variables, coverage_map, biomarkers)
 
     assert uncovered == ["B"]
+
+
+def test_solver_parameters_scale_with_model_size():
+    small = solver_parameters(10, 5)
+    assert small == {"num_workers": 1, "linearization_level": 0}
+
+    medium = solver_parameters(200, 20)
+    assert medium["cp_model_probing_level"] == 2
+    assert "optimize_with_core" not in medium
+
+    large = solver_parameters(1000, 50)
+    assert large["optimize_with_core"] is True
+    assert large["core_minimization_level"] == 1
+
+
+def test_solve_model_applies_parameters():
+    model, _ = build_solver_model([make_candidate(id=1)])
+
+    _, solver = solve_model(model, {"num_workers": 1, "linearization_level": 0})
+
+    assert solver.parameters.num_workers == 1
+    assert solver.parameters.linearization_level == 0
+
+
+def test_apply_solution_hint_marks_selected_items():
+    candidates = [make_candidate(id=1, slug="a"), make_candidate(id=2, slug="b")]
+    model, variables = build_solver_model(candidates)
+
+    apply_solution_hint(model, variables, {2})
+
+    hint = model.Proto().solution_hint
+    hinted = dict(zip(hint.vars, hint.values, strict=True))
+    assert hinted == {variables[1].Index(): 0, variables[2].Index(): 1}
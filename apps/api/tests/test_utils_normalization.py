@@ -19,6 +19,7 @@ from panelyt_api.utils.normalization import (
     normalize_search_query,
     normalize_slug,
     normalize_token,
+    normalize_tokens_iter,
     normalize_tokens_set,
     normalize_username,
 )
@@ -38,6 +39,12 @@ class TestNormalizeToken:
         assert normalize_token("") is None
         assert normalize_token("  ") is None
 
+    def test_repeated_calls_are_memoized(self):
+        normalize_token.cache_clear()
+        assert normalize_token("  Ferritin ") == "ferritin"
+        assert normalize_token("  Ferritin ") == "ferritin"
+        assert normalize_token.cache_info().hits == 1
+
     def test_already_normalized(self):
         assert normalize_token("tsh") == "tsh"
 
@@ -145,6 +152,20 @@ class TestNormalizeUsername:
             normalize_username("user@test", pattern)  # Invalid character
 
 
+class TestNormalizeTokensIter:
+    """Test the normalize_tokens_iter function."""
+
+    def test_preserves_order_and_duplicates(self):
+        assert normalize_tokens_iter(["TSH", "  FT4  ", "tsh"]) == ["tsh", "ft4", "tsh"]
+
+    def test_filters_blank_values(self):
+        assert normalize_tokens_iter(["TSH", "", "  ", None, "FT4"]) == ["tsh", "ft4"]
+
+    def test_matches_normalize_token(self):
+        values = ["ALT", " b12 ", "Vitamin D", "\tGGTP\n"]
+        assert normalize_tokens_iter(values) == [normalize_token(value) for value in values]
+
+
 class TestNormalizeTokensSet:
     """Test the normalize_tokens_set function."""
 